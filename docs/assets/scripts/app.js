@@ -1,10 +1,11 @@
 import {
   DEFAULTS,
   MOBILE_MEDIA_QUERY,
+  SNAPSHOT_MAX_AGE_MS,
   SOURCE_CONFIG,
   SOURCE_STORAGE_KEY
-} from "./config.js";
-import { incrementVisitCounter, loadSourcePayload } from "./services.js";
+} from "./config.js?v=20261015-1200";
+import { incrementVisitCounter, loadSourcePayload } from "./services.js?v=20261015-1200";
 import {
   dedupePlayers,
   extractPlayers,
@@ -13,20 +14,24 @@ import {
   hasActiveFilters,
   isValidSelectValue,
   sortPlayers
-} from "./utils.js";
+} from "./utils.js?v=20261015-1200";
 import {
   renderDesktopRows,
   renderEmptyState,
   renderMobileCards,
   renderPager
-} from "./renderers.js";
+} from "./renderers.js?v=20261015-1200";
 
 const state = {
   source: DEFAULTS.source,
   allPlayers: [],
   filteredPlayers: [],
+  lastFilter: null,
+  sortedViews: new Map(),
+  sourceSnapshots: new Map(),
   generatedAt: null,
   page: 1,
+  renderedLayout: null,
   requestId: 0
 };
 
@@ -53,6 +58,8 @@ const elements = {
   backToTop: document.getElementById("backToTop")
 };
 
+const mobileMediaQuery = window.matchMedia(MOBILE_MEDIA_QUERY);
+
 function getSourceConfig() {
   return SOURCE_CONFIG[state.source] || SOURCE_CONFIG[DEFAULTS.source];
 }
@@ -75,7 +82,6 @@ function persistSource(source) {
 
 function updateSourceUi() {
   const sourceConfig = getSourceConfig();
-  elements.body.dataset.source = sourceConfig.id;
 
   for (const tab of elements.sourceTabs) {
     const isActive = tab.dataset.source === sourceConfig.id;
@@ -83,6 +89,13 @@ function updateSourceUi() {
     tab.setAttribute("aria-selected", String(isActive));
   }
 
+  // O index.html ja vem com os textos do Lichess; so reescreve (e reparseia o
+  // HTML da descricao) quando a fonte exibida muda de fato.
+  if (elements.body.dataset.source === sourceConfig.id) {
+    return;
+  }
+
+  elements.body.dataset.source = sourceConfig.id;
   elements.heroTitle.textContent = sourceConfig.heroTitle;
   elements.heroDescription.innerHTML = sourceConfig.heroDescription;
   elements.joinTeamBtn.href = sourceConfig.ctaUrl;
@@ -198,11 +211,11 @@ function renderEmpty() {
 
   elements.tbody.innerHTML = `<tr><td colspan="7">${emptyBlock}</td></tr>`;
   elements.cardList.innerHTML = emptyBlock;
-  elements.pager.innerHTML = "";
+  elements.pager.replaceChildren();
 }
 
 function applyResponsiveAria() {
-  const isMobile = window.matchMedia(MOBILE_MEDIA_QUERY).matches;
+  const isMobile = mobileMediaQuery.matches;
   elements.tableWrap.setAttribute("aria-hidden", String(isMobile));
   elements.cardList.setAttribute("aria-hidden", String(!isMobile));
 }
@@ -237,20 +250,26 @@ function render() {
   const pageItems = state.filteredPlayers.slice(startIndex, startIndex + perPage);
 
   if (pageItems.length === 0) {
+    state.renderedLayout = null;
     renderEmpty();
   } else {
-    elements.tbody.innerHTML = renderDesktopRows(
-      pageItems,
-      startIndex,
-      sourceConfig.id,
-      sourceConfig
-    );
-    elements.cardList.innerHTML = renderMobileCards(
-      pageItems,
-      startIndex,
-      sourceConfig.id,
-      sourceConfig
-    );
+    // Tabela e cards sao alternativas exclusivas (a outra fica com display:none);
+    // so o layout visivel e montado, e o outro e esvaziado ate a media mudar.
+    const isMobile = mobileMediaQuery.matches;
+    state.renderedLayout = isMobile ? "mobile" : "desktop";
+
+    if (isMobile) {
+      elements.tbody.replaceChildren();
+      elements.cardList.replaceChildren(
+        ...renderMobileCards(pageItems, startIndex, sourceConfig.id, sourceConfig)
+      );
+    } else {
+      elements.cardList.replaceChildren();
+      elements.tbody.replaceChildren(
+        ...renderDesktopRows(pageItems, startIndex, sourceConfig.id, sourceConfig)
+      );
+    }
+
     renderPager(elements.pager, state.page, totalPages, (nextPage) => {
       state.page = nextPage;
       render();
@@ -262,51 +281,228 @@ function render() {
   syncUrl();
 }
 
+function getSortedView(sortKey, order) {
+  const viewKey = `${sortKey}:${order}`;
+  let view = state.sortedViews.get(viewKey);
+
+  if (!view) {
+    // Com a ordem oposta ja calculada, inverter a permutacao e O(n) e da o
+    // mesmo resultado que ordenar de novo.
+    const oppositeView = state.sortedViews.get(`${sortKey}:${order === "asc" ? "desc" : "asc"}`);
+    view = oppositeView
+      ? oppositeView.slice().reverse()
+      : sortPlayers(state.allPlayers, sortKey, order);
+    state.sortedViews.set(viewKey, view);
+  }
+
+  return view;
+}
+
+function setAllPlayers(players, sortedViews = new Map()) {
+  state.allPlayers = players;
+  state.sortedViews = sortedViews;
+}
+
+function scheduleIdle(callback) {
+  if (typeof window.requestIdleCallback === "function") {
+    window.requestIdleCallback(callback, { timeout: 2_000 });
+    return;
+  }
+
+  window.setTimeout(callback, 200);
+}
+
+function warmSortedViews() {
+  const players = state.allPlayers;
+  const pending = [];
+
+  for (const sortOption of elements.sort.options) {
+    for (const orderOption of elements.order.options) {
+      pending.push([sortOption.value, orderOption.value]);
+    }
+  }
+
+  // Pre-ordena as demais visoes em segundo plano, uma por vez, para que trocar
+  // a ordenacao nao precise ordenar a lista na hora.
+  const step = () => {
+    if (state.allPlayers !== players || pending.length === 0) {
+      return;
+    }
+
+    const [sortKey, order] = pending.shift();
+    getSortedView(sortKey, order);
+    scheduleIdle(step);
+  };
+
+  scheduleIdle(step);
+}
+
 function applyFilters() {
-  const query = elements.search.value;
-  const filtered = filterPlayers(state.allPlayers, query);
-  state.filteredPlayers = sortPlayers(filtered, elements.sort.value, elements.order.value);
+  // A busca preserva a ordem, entao filtra sobre a visao ja ordenada em cache.
+  const sortedPlayers = getSortedView(elements.sort.value, elements.order.value);
+  const query = elements.search.value.trim().toLowerCase();
+  // Enquanto o usuario so acrescenta letras, todo resultado novo ja estava no
+  // anterior: basta refiltrar o resultado atual, nao a lista inteira.
+  const { lastFilter } = state;
+  const narrowsLastFilter =
+    lastFilter && lastFilter.view === sortedPlayers && query.includes(lastFilter.query);
+
+  state.filteredPlayers = filterPlayers(
+    narrowsLastFilter ? state.filteredPlayers : sortedPlayers,
+    query
+  );
+  state.lastFilter = { view: sortedPlayers, query };
   render();
 }
 
+// Os dados so mudam na geracao diaria: cada fonte e baixada e normalizada uma
+// vez por visita, e voltar para uma aba ja carregada reaproveita a lista e as
+// visoes ordenadas em vez de repetir o download e a ordenacao.
+async function loadSourceSnapshot(sourceConfig, signal) {
+  const payload = await loadSourcePayload(sourceConfig, { signal });
+  const players = dedupePlayers(extractPlayers(payload));
+  players.sort((left, right) => {
+    const leftPosition = Number(left?.position ?? Number.MAX_SAFE_INTEGER);
+    const rightPosition = Number(right?.position ?? Number.MAX_SAFE_INTEGER);
+    return leftPosition - rightPosition;
+  });
+
+  return {
+    players,
+    generatedAt: payload?.generated_at || null,
+    sortedViews: new Map(),
+    loadedAt: Date.now()
+  };
+}
+
+// Uma unica requisicao por fonte em andamento, compartilhada entre a carga da
+// aba ativa e a pre-carga das demais.
+const pendingSnapshots = new Map();
+
+function requestSourceSnapshot(sourceConfig, signal) {
+  let request = pendingSnapshots.get(sourceConfig.id);
+  if (!request) {
+    const forget = () => {
+      if (pendingSnapshots.get(sourceConfig.id) === request) {
+        pendingSnapshots.delete(sourceConfig.id);
+      }
+    };
+
+    request = loadSourceSnapshot(sourceConfig, signal).finally(forget);
+    pendingSnapshots.set(sourceConfig.id, request);
+    // Uma requisicao cancelada sai do mapa na hora, para que uma nova carga da
+    // mesma fonte nao se junte a ela.
+    signal?.addEventListener("abort", forget, { once: true });
+  }
+
+  return request;
+}
+
+function prefetchOtherSources() {
+  // Com a fonte ativa na tela, baixa as demais em segundo plano: trocar de aba
+  // passa a usar o snapshot em memoria, sem rede.
+  for (const sourceConfig of Object.values(SOURCE_CONFIG)) {
+    if (state.sourceSnapshots.has(sourceConfig.id) || pendingSnapshots.has(sourceConfig.id)) {
+      continue;
+    }
+
+    scheduleIdle(() => {
+      requestSourceSnapshot(sourceConfig)
+        .then((snapshot) => {
+          if (!state.sourceSnapshots.has(sourceConfig.id)) {
+            state.sourceSnapshots.set(sourceConfig.id, snapshot);
+          }
+        })
+        .catch(() => {
+          // a aba carrega (e reporta o erro) normalmente quando for aberta
+        });
+    });
+  }
+}
+
+function isSnapshotStale(snapshot) {
+  return Date.now() - snapshot.loadedAt > SNAPSHOT_MAX_AGE_MS;
+}
+
+function applySnapshot(sourceConfig, snapshot, { resetPage = false } = {}) {
+  state.sourceSnapshots.set(sourceConfig.id, snapshot);
+  const { players } = snapshot;
+  setAllPlayers(players, snapshot.sortedViews);
+  state.generatedAt = snapshot.generatedAt;
+
+  if (resetPage) {
+    state.page = 1;
+  }
+
+  elements.totalBadge.textContent = String(players.length);
+  elements.info.textContent = formatInfoLine(
+    sourceConfig.label,
+    players.length,
+    state.generatedAt
+  );
+
+  applyFilters();
+  warmSortedViews();
+  prefetchOtherSources();
+}
+
+// Com a pagina aberta por muito tempo, revalida os dados em segundo plano ao
+// voltar para a aba: a tabela atual continua na tela e so e trocada se houver
+// uma geracao nova (a requisicao condicional costuma voltar 304).
+async function revalidateSnapshot() {
+  const sourceConfig = getSourceConfig();
+  const snapshot = state.sourceSnapshots.get(sourceConfig.id);
+  if (!snapshot || !isSnapshotStale(snapshot)) {
+    return;
+  }
+
+  const currentRequestId = state.requestId;
+  try {
+    const freshSnapshot = await requestSourceSnapshot(sourceConfig);
+    if (currentRequestId !== state.requestId) {
+      return;
+    }
+
+    if (freshSnapshot.generatedAt === snapshot.generatedAt) {
+      snapshot.loadedAt = freshSnapshot.loadedAt;
+      return;
+    }
+
+    applySnapshot(sourceConfig, freshSnapshot);
+  } catch (error) {
+    console.error(error);
+  }
+}
+
+// Carga da aba ativa em andamento: trocar de fonte antes dela terminar cancela
+// o download (e o parse) que ja nao seria exibido.
+let activeLoadController = null;
+
 async function loadData({ resetPage = false } = {}) {
   const sourceConfig = getSourceConfig();
   const currentRequestId = ++state.requestId;
+  activeLoadController?.abort();
+  const loadController = new AbortController();
+  activeLoadController = loadController;
 
   elements.info.textContent = `Carregando ${sourceConfig.label}...`;
   elements.totalBadge.textContent = "--";
-  elements.tbody.innerHTML = "";
-  elements.cardList.innerHTML = "";
-  elements.pager.innerHTML = "";
+  elements.tbody.replaceChildren();
+  elements.cardList.replaceChildren();
+  elements.pager.replaceChildren();
+  state.renderedLayout = null;
 
   try {
-    const payload = await loadSourcePayload(sourceConfig);
+    const cachedSnapshot = state.sourceSnapshots.get(sourceConfig.id);
+    const snapshot =
+      cachedSnapshot && !isSnapshotStale(cachedSnapshot)
+        ? cachedSnapshot
+        : await requestSourceSnapshot(sourceConfig, loadController.signal);
     if (currentRequestId !== state.requestId) {
       return;
     }
 
-    const players = dedupePlayers(extractPlayers(payload));
-    players.sort((left, right) => {
-      const leftPosition = Number(left?.position ?? Number.MAX_SAFE_INTEGER);
-      const rightPosition = Number(right?.position ?? Number.MAX_SAFE_INTEGER);
-      return leftPosition - rightPosition;
-    });
-
-    state.allPlayers = players;
-    state.generatedAt = payload?.generated_at || null;
-
-    if (resetPage) {
-      state.page = 1;
-    }
-
-    elements.totalBadge.textContent = String(players.length);
-    elements.info.textContent = formatInfoLine(
-      sourceConfig.label,
-      players.length,
-      state.generatedAt
-    );
-
-    applyFilters();
+    applySnapshot(sourceConfig, snapshot, { resetPage });
   } catch (error) {
     if (currentRequestId !== state.requestId) {
       return;
@@ -314,8 +510,9 @@ async function loadData({ resetPage = false } = {}) {
 
     console.error(error);
     elements.info.textContent = `Erro ao carregar dados de ${sourceConfig.label}`;
-    state.allPlayers = [];
+    setAllPlayers([]);
     state.filteredPlayers = [];
+    state.lastFilter = null;
     renderEmpty();
   }
 }
@@ -405,21 +602,31 @@ function bindEvents() {
     }
   });
 
-  const mediaQuery = window.matchMedia(MOBILE_MEDIA_QUERY);
-  const handleMediaChange = () => applyResponsiveAria();
+  const handleMediaChange = () => {
+    const layout = mobileMediaQuery.matches ? "mobile" : "desktop";
+    if (state.renderedLayout && state.renderedLayout !== layout) {
+      render();
+      return;
+    }
+
+    applyResponsiveAria();
+  };
 
-  if (typeof mediaQuery.addEventListener === "function") {
-    mediaQuery.addEventListener("change", handleMediaChange);
-  } else if (typeof mediaQuery.addListener === "function") {
-    mediaQuery.addListener(handleMediaChange);
+  if (typeof mobileMediaQuery.addEventListener === "function") {
+    mobileMediaQuery.addEventListener("change", handleMediaChange);
+  } else if (typeof mobileMediaQuery.addListener === "function") {
+    mobileMediaQuery.addListener(handleMediaChange);
   }
 
   window.addEventListener("scroll", updateBackToTopVisibility, { passive: true });
+  document.addEventListener("visibilitychange", () => {
+    if (document.visibilityState === "visible") {
+      revalidateSnapshot();
+    }
+  });
 }
 
 async function hydrateVisitCounter() {
-  elements.visitBadge.textContent = "...";
-
   try {
     const count = await incrementVisitCounter();
     elements.visitBadge.textContent = Number.isFinite(count)
@@ -436,8 +643,11 @@ function bootstrap() {
   setSource(state.source, { persist: true, resetPage: false });
   bindEvents();
   updateBackToTopVisibility();
-  hydrateVisitCounter();
-  loadData({ resetPage: false });
+  // O contador e uma requisicao a outro dominio (DNS, TLS e uma escrita no
+  // servidor dele); so dispara depois do ranking, para nao disputar a rede
+  // com o JSON que a pagina precisa para aparecer.
+  elements.visitBadge.textContent = "...";
+  loadData({ resetPage: false }).finally(() => scheduleIdle(hydrateVisitCounter));
 }
 
 bootstrap();
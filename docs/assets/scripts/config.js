@@ -8,6 +8,8 @@ export const DEFAULTS = Object.freeze({
 export const RHYTHMS = Object.freeze(["blitz", "bullet", "rapid"]);
 export const SOURCE_STORAGE_KEY = "ranking_selected_source";
 export const MOBILE_MEDIA_QUERY = "(max-width: 920px)";
+// Depois disso, voltar para a aba ou para uma fonte ja carregada revalida os dados.
+export const SNAPSHOT_MAX_AGE_MS = 10 * 60 * 1000;
 
 export const VISIT_COUNTER_CONFIG = Object.freeze({
   apiBaseUrl: "https://api.counterapi.dev/v1",
@@ -26,7 +28,7 @@ export const SOURCE_CONFIG = Object.freeze({
     heroTitle: "Quer aparecer no ranking?",
     heroDescription:
       'Seja membro do time <strong>xadrezjovemes</strong> no Lichess. Você aparece automaticamente após a geração diária.',
-    footerText: "Dados: Lichess. Atualizado uma vez por dia.",
+    footerText: "Dados: Lichess. Verificado uma vez por dia.",
     hasCountryRanks: false
   }),
   chesscom: Object.freeze({
@@ -39,7 +41,7 @@ export const SOURCE_CONFIG = Object.freeze({
     heroTitle: "Quer aparecer no ranking?",
     heroDescription:
       'Seja membro do clube <strong>xadrez-jovem-es</strong> no Chess.com. O ranking nacional aparece por ritmo quando o dado público estiver disponível.',
-    footerText: "Dados: Chess.com. Atualizado uma vez por dia.",
+    footerText: "Dados: Chess.com. Verificado uma vez por dia.",
     hasCountryRanks: true
   })
 });
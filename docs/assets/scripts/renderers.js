@@ -15,7 +15,7 @@ import {
   getProfileUrl,
   normalizeArrow,
   safeNumber
-} from "./utils.js";
+} from "./utils.js?v=20261015-1200";
 
 function renderPositionBadge(player) {
   const arrow = normalizeArrow(player?.position_arrow);
@@ -102,115 +102,225 @@ function renderRatingCell(player, rhythm, sourceId) {
   `;
 }
 
-export function renderDesktopRows(items, startIndex, sourceId, sourceConfig) {
-  return items
-    .map((player, index) => {
-      const rank = startIndex + index + 1;
-      const profileUrl = getProfileUrl(player, sourceConfig);
-      const realName = getPlayerName(player);
-      const identityChips = renderIdentityChips(player);
-      const rowClass = rank <= 3 ? `row-top-${rank}` : "";
-      const seenShort = formatSeenCompact(player?.seenAt);
-      const seenTitle = formatSeenTitle(player?.seenAt);
-
-      return `
-        <tr class="${rowClass}">
-          <td class="rank">#${rank}</td>
-          <td class="pos-col">${renderPositionBadge(player)}</td>
-          <td class="user-cell">
-            <div class="user-main">
-              ${identityChips}
-              <a class="player-name" href="${escapeHtml(profileUrl)}" target="_blank" rel="noopener">${escapeHtml(player?.username || "sem-usuário")}</a>
-            </div>
-            <span class="realname">${escapeHtml(realName)}</span>
-          </td>
-          ${renderRatingCell(player, "blitz", sourceId)}
+// Os trechos de cada jogador nao dependem da pagina nem da ordenacao: sao
+// montados uma vez por jogador e reaproveitados em toda nova renderizacao.
+const playerFragments = new WeakMap();
+
+function getPlayerFragments(player, sourceId, sourceConfig) {
+  const cached = playerFragments.get(player);
+  if (cached && cached.sourceId === sourceId) {
+    return cached;
+  }
+
+  const fragments = {
+    sourceId,
+    username: escapeHtml(player?.username || "sem-usuário"),
+    profileUrl: escapeHtml(getProfileUrl(player, sourceConfig)),
+    realName: escapeHtml(getPlayerName(player)),
+    identityChips: renderIdentityChips(player),
+    positionBadge: renderPositionBadge(player),
+    initial: escapeHtml(String(player?.username || "?").charAt(0).toUpperCase() || "?"),
+    ratingCells: `${renderRatingCell(player, "blitz", sourceId)}
           ${renderRatingCell(player, "bullet", sourceId)}
-          ${renderRatingCell(player, "rapid", sourceId)}
-          <td class="seen-cell" title="${escapeHtml(seenTitle)}">${escapeHtml(seenShort)}</td>
-        </tr>
-      `;
-    })
-    .join("");
+          ${renderRatingCell(player, "rapid", sourceId)}`,
+    currentMetricCards: `${renderCurrentMetricCard(player, "blitz", sourceId, "Blitz")}
+                ${renderCurrentMetricCard(player, "bullet", sourceId, "Bullet")}
+                ${renderCurrentMetricCard(player, "rapid", sourceId, "Rapid")}`,
+    peakMetricCards: `${renderPeakMetricCard(player, "blitz", "Blitz")}
+                ${renderPeakMetricCard(player, "bullet", "Bullet")}
+                ${renderPeakMetricCard(player, "rapid", "Rapid")}`
+  };
+
+  playerFragments.set(player, fragments);
+  return fragments;
 }
 
-export function renderMobileCards(items, startIndex, sourceId, sourceConfig) {
-  return items
-    .map((player, index) => {
-      const rank = startIndex + index + 1;
-      const profileUrl = getProfileUrl(player, sourceConfig);
-      const realName = getPlayerName(player);
-      const identityChips = renderIdentityChips(player);
-      const positionBadge = renderPositionBadge(player);
-      const rowClass = rank <= 3 ? `row-top-${rank}` : "";
-      const initial = escapeHtml(String(player?.username || "?").charAt(0).toUpperCase() || "?");
-      const seenShort = formatSeenCompact(player?.seenAt);
-      const seenTitle = formatSeenTitle(player?.seenAt);
-
-      return `
-        <article class="player-card ${rowClass}" tabindex="0" role="button" aria-pressed="false" aria-label="Mostrar máximas de ${escapeHtml(player?.username || "sem-usuário")}">
-          <div class="player-card-inner">
-            <section class="player-card-face player-card-face-front">
-              <div class="player-card-header">
-                <div class="avatar" aria-hidden="true">${initial}</div>
-                <div class="player-card-body">
-                  <div class="player-title-row">
-                    <span class="player-rank-label">#${rank}</span>
-                    ${identityChips}
-                    <span class="player-name">${escapeHtml(player?.username || "sem-usuário")}</span>
-                  </div>
-                  <span class="player-realname">${escapeHtml(realName)}</span>
-                  <span class="player-country">Movimento: ${positionBadge}</span>
-                  <span class="player-country" title="${escapeHtml(seenTitle)}">Ativo: ${escapeHtml(seenShort)}</span>
-                </div>
-              </div>
+function buildDesktopRowMarkup(player, sourceId, sourceConfig) {
+  const fragments = getPlayerFragments(player, sourceId, sourceConfig);
 
-              <div class="player-metrics">
-                ${renderCurrentMetricCard(player, "blitz", sourceId, "Blitz")}
-                ${renderCurrentMetricCard(player, "bullet", sourceId, "Bullet")}
-                ${renderCurrentMetricCard(player, "rapid", sourceId, "Rapid")}
-              </div>
+  return `
+    <tr>
+      <td class="rank"></td>
+      <td class="pos-col">${fragments.positionBadge}</td>
+      <td class="user-cell">
+        <div class="user-main">
+          ${fragments.identityChips}
+          <a class="player-name" href="${fragments.profileUrl}" target="_blank" rel="noopener">${fragments.username}</a>
+        </div>
+        <span class="realname">${fragments.realName}</span>
+      </td>
+      ${fragments.ratingCells}
+      <td class="seen-cell"></td>
+    </tr>
+  `;
+}
 
-              <div class="player-card-actions">
-                <span class="player-card-hint">Toque para ver máximas registradas</span>
-                <a class="player-profile-link js-profile-link" href="${escapeHtml(profileUrl)}" target="_blank" rel="noopener">Perfil</a>
-              </div>
-            </section>
-
-            <section class="player-card-face player-card-face-back">
-              <div class="player-card-header">
-                <div class="avatar" aria-hidden="true">${initial}</div>
-                <div class="player-card-body">
-                  <div class="player-title-row">
-                    <span class="player-rank-label">#${rank}</span>
-                    ${identityChips}
-                    <span class="player-name">${escapeHtml(player?.username || "sem-usuário")}</span>
-                  </div>
-                  <span class="player-realname">${escapeHtml(realName)}</span>
-                  <span class="player-country">Máximas registradas</span>
-                  <span class="player-country">Clique novamente para voltar</span>
-                </div>
-              </div>
+function buildMobileCardMarkup(player, sourceId, sourceConfig) {
+  const fragments = getPlayerFragments(player, sourceId, sourceConfig);
 
-              <div class="player-metrics">
-                ${renderPeakMetricCard(player, "blitz", "Blitz")}
-                ${renderPeakMetricCard(player, "bullet", "Bullet")}
-                ${renderPeakMetricCard(player, "rapid", "Rapid")}
+  return `
+    <article class="player-card" tabindex="0" role="button" aria-pressed="false" aria-label="Mostrar máximas de ${fragments.username}">
+      <div class="player-card-inner">
+        <section class="player-card-face player-card-face-front">
+          <div class="player-card-header">
+            <div class="avatar" aria-hidden="true">${fragments.initial}</div>
+            <div class="player-card-body">
+              <div class="player-title-row">
+                <span class="player-rank-label"></span>
+                ${fragments.identityChips}
+                <span class="player-name">${fragments.username}</span>
               </div>
+              <span class="player-realname">${fragments.realName}</span>
+              <span class="player-country">Movimento: ${fragments.positionBadge}</span>
+              <span class="player-country js-player-seen"></span>
+            </div>
+          </div>
+
+          <div class="player-metrics">
+            ${fragments.currentMetricCards}
+          </div>
 
-              <div class="player-card-actions">
-                <span class="player-card-hint">Histórico de pico por ritmo</span>
-                <a class="player-profile-link js-profile-link" href="${escapeHtml(profileUrl)}" target="_blank" rel="noopener">Perfil</a>
+          <div class="player-card-actions">
+            <span class="player-card-hint">Toque para ver máximas registradas</span>
+            <a class="player-profile-link js-profile-link" href="${fragments.profileUrl}" target="_blank" rel="noopener">Perfil</a>
+          </div>
+        </section>
+
+        <section class="player-card-face player-card-face-back">
+          <div class="player-card-header">
+            <div class="avatar" aria-hidden="true">${fragments.initial}</div>
+            <div class="player-card-body">
+              <div class="player-title-row">
+                <span class="player-rank-label"></span>
+                ${fragments.identityChips}
+                <span class="player-name">${fragments.username}</span>
               </div>
-            </section>
+              <span class="player-realname">${fragments.realName}</span>
+              <span class="player-country">Máximas registradas</span>
+              <span class="player-country">Clique novamente para voltar</span>
+            </div>
+          </div>
+
+          <div class="player-metrics">
+            ${fragments.peakMetricCards}
           </div>
-        </article>
-      `;
-    })
-    .join("");
+
+          <div class="player-card-actions">
+            <span class="player-card-hint">Histórico de pico por ritmo</span>
+            <a class="player-profile-link js-profile-link" href="${fragments.profileUrl}" target="_blank" rel="noopener">Perfil</a>
+          </div>
+        </section>
+      </div>
+    </article>
+  `;
 }
 
+// Linhas e cards sao parseados uma unica vez por jogador (todos os que faltam
+// de uma pagina num unico parse) e os nos sao reaproveitados nas renderizacoes
+// seguintes; a cada pagina so a posicao e o "visto por ultimo" sao atualizados,
+// via textContent, sem passar de novo pelo parser de HTML. A data completa do
+// ultimo login nao depende do relogio e e formatada uma vez, na criacao do no;
+// o texto relativo so e reescrito quando muda.
+const markupParser = document.createElement("template");
+const desktopRows = new WeakMap();
+const mobileCards = new WeakMap();
+
+function materializeNodes(items, cache, sourceId, sourceConfig, buildMarkup, collectParts) {
+  const missing = items.filter((player) => cache.get(player)?.sourceId !== sourceId);
+
+  if (missing.length > 0) {
+    markupParser.innerHTML = missing
+      .map((player) => buildMarkup(player, sourceId, sourceConfig))
+      .join("");
+    const nodes = [...markupParser.content.children];
+    markupParser.content.replaceChildren();
+
+    missing.forEach((player, index) => {
+      cache.set(player, {
+        sourceId,
+        node: nodes[index],
+        seenText: null,
+        ...collectParts(nodes[index], player)
+      });
+    });
+  }
+
+  return items.map((player) => cache.get(player));
+}
+
+export function renderDesktopRows(items, startIndex, sourceId, sourceConfig) {
+  const entries = materializeNodes(
+    items,
+    desktopRows,
+    sourceId,
+    sourceConfig,
+    buildDesktopRowMarkup,
+    (node, player) => {
+      const seenCell = node.querySelector(".seen-cell");
+      seenCell.title = formatSeenTitle(player?.seenAt);
+      return { rankCell: node.querySelector(".rank"), seenCell };
+    }
+  );
+
+  return entries.map((entry, index) => {
+    const rank = startIndex + index + 1;
+    const seenText = formatSeenCompact(items[index]?.seenAt);
+
+    entry.node.className = rank <= 3 ? `row-top-${rank}` : "";
+    entry.rankCell.textContent = `#${rank}`;
+    if (entry.seenText !== seenText) {
+      entry.seenCell.textContent = seenText;
+      entry.seenText = seenText;
+    }
+    return entry.node;
+  });
+}
+
+export function renderMobileCards(items, startIndex, sourceId, sourceConfig) {
+  const entries = materializeNodes(
+    items,
+    mobileCards,
+    sourceId,
+    sourceConfig,
+    buildMobileCardMarkup,
+    (node, player) => {
+      const seenLabel = node.querySelector(".js-player-seen");
+      seenLabel.title = formatSeenTitle(player?.seenAt);
+      return { rankLabels: [...node.querySelectorAll(".player-rank-label")], seenLabel };
+    }
+  );
+
+  return entries.map((entry, index) => {
+    const rank = startIndex + index + 1;
+    const seenText = formatSeenCompact(items[index]?.seenAt);
+
+    // Um card reaproveitado volta para a frente, como um card recem-criado.
+    entry.node.className = rank <= 3 ? `player-card row-top-${rank}` : "player-card";
+    entry.node.setAttribute("aria-pressed", "false");
+    for (const label of entry.rankLabels) {
+      label.textContent = `#${rank}`;
+    }
+    if (entry.seenText !== seenText) {
+      entry.seenLabel.textContent = `Ativo: ${seenText}`;
+      entry.seenText = seenText;
+    }
+    return entry.node;
+  });
+}
+
+const emptyStateMarkup = new Map();
+
 export function renderEmptyState(hasFilters) {
+  // So existem duas variantes e nenhuma depende dos dados: monta cada uma uma vez.
+  const key = Boolean(hasFilters);
+  if (!emptyStateMarkup.has(key)) {
+    emptyStateMarkup.set(key, buildEmptyState(key));
+  }
+
+  return emptyStateMarkup.get(key);
+}
+
+function buildEmptyState(hasFilters) {
   const title = hasFilters
     ? "Nenhum jogador encontrado com os filtros atuais."
     : "Ainda não há jogadores disponíveis nesta fonte.";
@@ -251,9 +361,8 @@ function createPagerButton(label, targetPage, disabled, currentPage, onPageChang
 }
 
 export function renderPager(container, page, totalPages, onPageChange) {
-  container.innerHTML = "";
-
   if (totalPages <= 1) {
+    container.replaceChildren();
     return;
   }
 
@@ -261,24 +370,28 @@ export function renderPager(container, page, totalPages, onPageChange) {
   const lastPage = totalPages;
   const start = Math.max(firstPage, page - 2);
   const end = Math.min(lastPage, page + 2);
+  // Os botoes sao montados fora do documento e entram numa unica troca.
+  const fragment = document.createDocumentFragment();
 
-  container.appendChild(
+  fragment.appendChild(
     createPagerButton("<<", firstPage, page === firstPage, page, onPageChange)
   );
-  container.appendChild(
+  fragment.appendChild(
     createPagerButton("<", Math.max(firstPage, page - 1), page === firstPage, page, onPageChange)
   );
 
   for (let current = start; current <= end; current += 1) {
-    container.appendChild(
+    fragment.appendChild(
       createPagerButton(String(current), current, false, page, onPageChange)
     );
   }
 
-  container.appendChild(
+  fragment.appendChild(
     createPagerButton(">", Math.min(lastPage, page + 1), page === lastPage, page, onPageChange)
   );
-  container.appendChild(
+  fragment.appendChild(
     createPagerButton(">>", lastPage, page === lastPage, page, onPageChange)
   );
+
+  container.replaceChildren(fragment);
 }
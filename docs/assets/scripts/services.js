@@ -1,8 +1,11 @@
-import { VISIT_COUNTER_CONFIG } from "./config.js";
+import { VISIT_COUNTER_CONFIG } from "./config.js?v=20261015-1200";
 
-export async function loadSourcePayload(sourceConfig) {
-  const response = await fetch(`./${sourceConfig.file}?v=${Date.now()}`, {
-    cache: "no-store"
+export async function loadSourcePayload(sourceConfig, { signal } = {}) {
+  // "no-cache" sempre revalida com o servidor (If-None-Match/If-Modified-Since),
+  // mas reaproveita a copia local quando o arquivo nao mudou (HTTP 304).
+  const response = await fetch(`./${sourceConfig.file}`, {
+    cache: "no-cache",
+    signal
   });
 
   if (!response.ok) {
@@ -1,4 +1,4 @@
-import { DEFAULTS, RHYTHMS } from "./config.js";
+import { DEFAULTS, RHYTHMS } from "./config.js?v=20261015-1200";
 
 const TITLE_OVERRIDES = Object.freeze({
   gedevonarrudev: "DEV",
@@ -22,16 +22,24 @@ const COUNTRY_DISPLAY_NAMES =
     ? new Intl.DisplayNames(["pt-BR", "en"], { type: "region" })
     : null;
 
+const HTML_ESCAPES = Object.freeze({
+  "&": "&amp;",
+  "<": "&lt;",
+  ">": "&gt;",
+  '"': "&quot;",
+  "'": "&#39;"
+});
+const HTML_ESCAPE_PATTERN = /[&<>"']/g;
+const HTML_ESCAPE_TEST_PATTERN = /[&<>"']/;
+
 export function escapeHtml(value) {
-  return String(value || "").replace(/[&<>"']/g, (char) => {
-    return {
-      "&": "&amp;",
-      "<": "&lt;",
-      ">": "&gt;",
-      '"': "&quot;",
-      "'": "&#39;"
-    }[char];
-  });
+  const text = String(value || "");
+  // A maioria dos textos (nomes, numeros) nao tem nada a escapar.
+  if (!HTML_ESCAPE_TEST_PATTERN.test(text)) {
+    return text;
+  }
+
+  return text.replace(HTML_ESCAPE_PATTERN, (char) => HTML_ESCAPES[char]);
 }
 
 export function safeNumber(value, fallback = 0) {
@@ -61,19 +69,23 @@ export function formatNumber(value, fallback = "--") {
   return numeric.toLocaleString("pt-BR");
 }
 
+// toLocaleString com opcoes monta um formatador novo a cada chamada; um unico
+// Intl.DateTimeFormat produz o mesmo texto sem esse custo por linha.
+const dateTimeFormatter = new Intl.DateTimeFormat("pt-BR", {
+  day: "2-digit",
+  month: "2-digit",
+  year: "numeric",
+  hour: "2-digit",
+  minute: "2-digit"
+});
+
 export function formatDateTime(value) {
   const timestamp = toTimestamp(value);
   if (!timestamp) {
     return "--";
   }
 
-  return new Date(timestamp).toLocaleString("pt-BR", {
-    day: "2-digit",
-    month: "2-digit",
-    year: "numeric",
-    hour: "2-digit",
-    minute: "2-digit"
-  });
+  return dateTimeFormatter.format(new Date(timestamp));
 }
 
 export function formatRelativeFromNow(value) {
@@ -107,13 +119,31 @@ export function formatRelativeFromNow(value) {
   return `há ${diffMonths} mês${diffMonths > 1 ? "es" : ""}`;
 }
 
+// O texto relativo muda no maximo uma vez por minuto: guarda o resultado por
+// timestamp e descarta tudo na virada do minuto, em vez de refazer as contas de
+// cada linha a cada renderizacao.
+const seenCompactCache = new Map();
+let seenCompactMinute = 0;
+
 export function formatSeenCompact(value) {
   const timestamp = toTimestamp(value);
   if (!timestamp) {
     return "sem info";
   }
 
-  return formatRelativeFromNow(timestamp);
+  const minute = Math.floor(Date.now() / 60_000);
+  if (minute !== seenCompactMinute) {
+    seenCompactCache.clear();
+    seenCompactMinute = minute;
+  }
+
+  let text = seenCompactCache.get(timestamp);
+  if (text === undefined) {
+    text = formatRelativeFromNow(timestamp);
+    seenCompactCache.set(timestamp, text);
+  }
+
+  return text;
 }
 
 export function formatSeenTitle(value) {
@@ -247,6 +277,8 @@ export function getCountryRankMuted(player, rhythm, sourceId) {
   return Boolean(sourceId === "chesscom" && getCountryCode(player) && !getCountryRankValue(player, rhythm));
 }
 
+// O JSON gerado nao traz mais a URL do perfil; `profile`/`url` so aparecem em
+// arquivos antigos e continuam aceitos.
 export function getProfileUrl(player, sourceConfig) {
   const explicit = String(player?.profile || player?.url || "").trim();
   if (explicit) {
@@ -286,32 +318,46 @@ export function extractPlayers(payload) {
 export function dedupePlayers(players) {
   const byUsername = new Map();
 
-  const getScore = (player) =>
-    RHYTHMS.reduce((sum, rhythm) => sum + safeNumber(player?.[rhythm], 0), 0);
-
   for (const player of players) {
     const usernameKey = getUsernameKey(player?.username);
     if (!usernameKey) {
       continue;
     }
 
+    let score = 0;
+    for (const rhythm of RHYTHMS) {
+      score += safeNumber(player?.[rhythm], 0);
+    }
+    const seen = toTimestamp(player?.seenAt) || 0;
     const previous = byUsername.get(usernameKey);
-    if (!previous) {
-      byUsername.set(usernameKey, player);
-      continue;
+
+    if (!previous || score > previous.score || seen > previous.seen) {
+      byUsername.set(usernameKey, { player, score, seen });
     }
+  }
 
-    const currentScore = getScore(player);
-    const previousScore = getScore(previous);
-    const currentSeen = toTimestamp(player?.seenAt) || 0;
-    const previousSeen = toTimestamp(previous?.seenAt) || 0;
+  return Array.from(byUsername.values(), (entry) => entry.player);
+}
 
-    if (currentScore > previousScore || currentSeen > previousSeen) {
-      byUsername.set(usernameKey, player);
-    }
+// Chaves derivadas de cada jogador (username em minusculas, compartilhado pela
+// ordenacao por usuario e pela busca, e a chave de busca), calculadas uma unica
+// vez em vez de converter todos os nomes a cada tecla. Ficam num unico registro
+// de formato fixo por jogador, em vez de uma entrada em cada WeakMap.
+// O separador nao pode ser digitado no campo, entao nao gera falsos positivos.
+const playerKeys = new WeakMap();
+
+function getPlayerKeys(player) {
+  let keys = playerKeys.get(player);
+  if (keys === undefined) {
+    const username = String(player?.username || "").toLowerCase();
+    keys = {
+      username,
+      search: `${username}\u0000${getPlayerName(player).toLowerCase()}`
+    };
+    playerKeys.set(player, keys);
   }
 
-  return [...byUsername.values()];
+  return keys;
 }
 
 export function filterPlayers(players, query) {
@@ -320,53 +366,100 @@ export function filterPlayers(players, query) {
     return [...players];
   }
 
-  return players.filter((player) => {
-    const username = String(player?.username || "").toLowerCase();
-    const realName = getPlayerName(player).toLowerCase();
-    return username.includes(normalizedQuery) || realName.includes(normalizedQuery);
-  });
+  return players.filter((player) => getPlayerKeys(player).search.includes(normalizedQuery));
+}
+
+// Colunas de ordenacao por lista de jogadores: cada campo e extraido uma unica
+// vez e reaproveitado por todas as visoes (asc/desc, e o desempate por posicao),
+// em vez de converter os campos de cada jogador a cada comparacao ou ordenacao.
+const sortColumns = new WeakMap();
+
+function extractSortColumn(players, sortKey) {
+  const count = players.length;
+
+  if (sortKey === "username") {
+    const column = new Array(count);
+    for (let index = 0; index < count; index += 1) {
+      column[index] = getPlayerKeys(players[index]).username;
+    }
+    return column;
+  }
+
+  const column = new Float64Array(count);
+  for (let index = 0; index < count; index += 1) {
+    column[index] =
+      sortKey === "position"
+        ? safeNumber(players[index]?.position, Number.MAX_SAFE_INTEGER)
+        : safeNumber(players[index]?.[sortKey], 0);
+  }
+  return column;
+}
+
+function getSortColumn(players, sortKey) {
+  let columns = sortColumns.get(players);
+  if (!columns) {
+    columns = new Map();
+    sortColumns.set(players, columns);
+  }
+
+  let column = columns.get(sortKey);
+  if (!column) {
+    column = extractSortColumn(players, sortKey);
+    columns.set(sortKey, column);
+  }
+
+  return column;
 }
 
 export function sortPlayers(players, sortKey, order) {
   const direction = order === "asc" ? 1 : -1;
-  const sorted = [...players];
-
-  sorted.sort((left, right) => {
-    if (sortKey === "username") {
-      const leftValue = String(left?.username || "").toLowerCase();
-      const rightValue = String(right?.username || "").toLowerCase();
-      return leftValue.localeCompare(rightValue) * direction;
+  const count = players.length;
+  const isUsernameSort = sortKey === "username";
+  const positions = getSortColumn(players, "position");
+  const values = getSortColumn(players, sortKey);
+
+  // Todos os criterios, inclusive o desempate final pelo indice, seguem a
+  // direcao: a visao crescente e exatamente a decrescente invertida.
+  const compare = (left, right) => {
+    if (isUsernameSort) {
+      return (values[left].localeCompare(values[right]) || left - right) * direction;
     }
 
-    if (sortKey === "position") {
-      const leftValue = safeNumber(left?.position, Number.MAX_SAFE_INTEGER);
-      const rightValue = safeNumber(right?.position, Number.MAX_SAFE_INTEGER);
-      return (leftValue - rightValue) * direction;
+    if (values[left] !== values[right]) {
+      return (values[left] - values[right]) * direction;
     }
 
-    const leftValue = safeNumber(left?.[sortKey], 0);
-    const rightValue = safeNumber(right?.[sortKey], 0);
+    return (positions[left] - positions[right] || left - right) * direction;
+  };
 
-    if (leftValue !== rightValue) {
-      return (leftValue - rightValue) * direction;
-    }
+  // A lista chega ordenada pela posicao, que ja costuma coincidir com a visao
+  // pedida (ex.: blitz decrescente); nesse caso basta uma passada linear.
+  let alreadySorted = true;
+  for (let index = 1; index < count && alreadySorted; index += 1) {
+    alreadySorted = compare(index - 1, index) < 0;
+  }
+
+  if (alreadySorted) {
+    return players.slice();
+  }
 
-    const leftPosition = safeNumber(left?.position, Number.MAX_SAFE_INTEGER);
-    const rightPosition = safeNumber(right?.position, Number.MAX_SAFE_INTEGER);
-    return (leftPosition - rightPosition) * direction;
-  });
+  const indexes = Array.from({ length: count }, (_, index) => index);
+  indexes.sort(compare);
 
-  return sorted;
+  return indexes.map((index) => players[index]);
 }
 
 export function formatInfoLine(sourceLabel, count, generatedAt) {
   const parts = [`Fonte: ${sourceLabel}`, `${formatNumber(count, "0")} jogador(es)`];
 
+  // generated_at so avanca quando os dados mudam (o gerador mantem o arquivo
+  // intacto quando nada mudou), entao marca a ultima alteracao, nao a ultima
+  // verificacao.
   if (generatedAt) {
     const relative = formatRelativeFromNow(generatedAt);
     const updatedLabel = relative
-      ? `atualizado: ${formatDateTime(generatedAt)} (${relative})`
-      : `atualizado: ${formatDateTime(generatedAt)}`;
+      ? `última alteração: ${formatDateTime(generatedAt)} (${relative})`
+      : `última alteração: ${formatDateTime(generatedAt)}`;
     parts.push(updatedLabel);
   }
 
@@ -20,6 +20,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Imprime o payload em stdout em vez de gravar arquivos."
     )
+    parser.add_argument(
+        "--max-age-minutes",
+        type=int,
+        default=0,
+        help="Reaproveita arquivos gerados ha menos minutos que isso, sem consultar as APIs."
+    )
+    parser.add_argument(
+        "--every-minutes",
+        type=int,
+        default=0,
+        help="Mantem o processo ativo e regenera os arquivos a cada tantos minutos."
+    )
     return parser.parse_args()
 
 
@@ -42,6 +54,12 @@ def main() -> int:
     if args.stdout:
         command.append("--stdout")
 
+    if args.max_age_minutes > 0:
+        command.extend(["--max-age-minutes", str(args.max_age_minutes)])
+
+    if args.every_minutes > 0:
+        command.extend(["--every-minutes", str(args.every_minutes)])
+
     result = subprocess.run(command, cwd=project_root)
     return result.returncode
 
@@ -2,6 +2,7 @@ import path from "node:path";
 import { fileURLToPath } from "node:url";
 import { generateChessComData } from "./lib/chesscom-source.mjs";
 import { generateLichessData } from "./lib/lichess-source.mjs";
+import { flushWarnings, logWarning, sleep } from "./lib/shared.mjs";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -11,7 +12,9 @@ const docsDir = path.join(projectRoot, "docs");
 function parseArgs(argv) {
   const args = {
     source: "all",
-    stdout: false
+    stdout: false,
+    maxAgeMinutes: 0,
+    everyMinutes: 0
   };
 
   for (let index = 0; index < argv.length; index += 1) {
@@ -24,20 +27,32 @@ function parseArgs(argv) {
     if (token === "--source") {
       args.source = argv[index + 1] || args.source;
       index += 1;
+      continue;
+    }
+
+    if (token === "--max-age-minutes") {
+      args.maxAgeMinutes = Math.max(0, Number(argv[index + 1]) || 0);
+      index += 1;
+      continue;
+    }
+
+    if (token === "--every-minutes") {
+      args.everyMinutes = Math.max(0, Number(argv[index + 1]) || 0);
+      index += 1;
     }
   }
 
   return args;
 }
 
-async function main() {
-  const args = parseArgs(process.argv.slice(2));
+async function generate(args) {
   const writeFile = !args.stdout;
+  const maxAgeMs = args.maxAgeMinutes * 60 * 1000;
 
   if (args.source === "all") {
     const [lichess, chesscom] = await Promise.all([
-      generateLichessData({ docsDir, writeFile }),
-      generateChessComData({ docsDir, writeFile })
+      generateLichessData({ docsDir, writeFile, maxAgeMs }),
+      generateChessComData({ docsDir, writeFile, maxAgeMs })
     ]);
 
     if (args.stdout) {
@@ -47,7 +62,7 @@ async function main() {
   }
 
   if (args.source === "lichess") {
-    const payload = await generateLichessData({ docsDir, writeFile });
+    const payload = await generateLichessData({ docsDir, writeFile, maxAgeMs });
     if (args.stdout) {
       process.stdout.write(JSON.stringify(payload, null, 2) + "\n");
     }
@@ -55,7 +70,7 @@ async function main() {
   }
 
   if (args.source === "chesscom") {
-    const payload = await generateChessComData({ docsDir, writeFile });
+    const payload = await generateChessComData({ docsDir, writeFile, maxAgeMs });
     if (args.stdout) {
       process.stdout.write(JSON.stringify(payload, null, 2) + "\n");
     }
@@ -65,7 +80,29 @@ async function main() {
   throw new Error(`Fonte inválida: ${args.source}`);
 }
 
+async function main() {
+  const args = parseArgs(process.argv.slice(2));
+  if (args.everyMinutes <= 0 || args.stdout) {
+    await generate(args);
+    return;
+  }
+
+  // Modo continuo: uma falha isolada nao derruba o processo.
+  const intervalMs = args.everyMinutes * 60 * 1000;
+  for (;;) {
+    const startedAt = Date.now();
+    try {
+      await generate(args);
+    } catch (error) {
+      logWarning(`erro gerando dados: ${error.message}`);
+    }
+    flushWarnings();
+    await sleep(Math.max(0, intervalMs - (Date.now() - startedAt)));
+  }
+}
+
 main().catch((error) => {
+  flushWarnings();
   console.error(`Erro gerando dados: ${error.message}`);
   process.exitCode = 1;
 });
@@ -1,5 +1,5 @@
 import path from "node:path";
-import { finalizePlayers } from "./ranking-builder.mjs";
+import { finalizePlayers, readFreshPayload } from "./ranking-builder.mjs";
 import { requestJson } from "./http-client.mjs";
 import {
   CHESSCOM_MAX_LEADERBOARD_PAGES,
@@ -7,9 +7,13 @@ import {
   LEADERBOARD_PAGE_DELAY_MS,
   MAX_CONCURRENCY,
   SPECIAL_TITLE_OVERRIDES,
+  encodeUsernamePath,
   extractCountryCodeFromUrl,
-  mapWithConcurrency,
+  getUsernameKey,
+  logWarning,
+  mapWithRetryPass,
   normalizeCountryCode,
+  reportFetchFailure,
   safeInt,
   safeTimestampMs,
   sleep
@@ -21,6 +25,7 @@ const CHESSCOM_PLAYER_URL = "https://api.chess.com/pub/player/";
 const CHESSCOM_PLAYER_STATS_URL = "https://api.chess.com/pub/player/";
 const CHESSCOM_LEADERBOARD_BASE_URL = "https://www.chess.com/callback/leaderboard/live";
 const LEADERBOARD_SEARCH_WINDOW = 10;
+const EMPTY_LEADERS_BY_USERNAME = new Map();
 
 function getLeaderboardUrl(rhythm) {
   const normalized = String(rhythm || "").trim().toLowerCase();
@@ -32,11 +37,11 @@ function getLeaderboardUrl(rhythm) {
 }
 
 function extractChessComRating(stats, key) {
-  return stats?.[key]?.last?.rating ?? null;
+  return safeInt(stats?.[key]?.last?.rating, null);
 }
 
 function extractChessComPeak(stats, key) {
-  return stats?.[key]?.best?.rating ?? stats?.[key]?.last?.rating ?? null;
+  return safeInt(stats?.[key]?.best?.rating ?? stats?.[key]?.last?.rating, null);
 }
 
 async function fetchChessComClubMembers() {
@@ -55,11 +60,13 @@ async function fetchChessComClubMembers() {
   return [...new Set(usernames)];
 }
 
-async function fetchChessComUser(username) {
+async function fetchChessComUser(username, { finalAttempt = true } = {}) {
+  const usernamePath = encodeUsernamePath(username);
+
   try {
     const [profile, stats] = await Promise.all([
-      requestJson(`${CHESSCOM_PLAYER_URL}${encodeURIComponent(username)}`),
-      requestJson(`${CHESSCOM_PLAYER_STATS_URL}${encodeURIComponent(username)}/stats`).catch(
+      requestJson(`${CHESSCOM_PLAYER_URL}${usernamePath}`),
+      requestJson(`${CHESSCOM_PLAYER_STATS_URL}${usernamePath}/stats`).catch(
         () => ({})
       )
     ]);
@@ -67,7 +74,6 @@ async function fetchChessComUser(username) {
     return {
       username,
       name: String(profile?.name || "").trim(),
-      profile: profile?.url || `https://www.chess.com/member/${username}`,
       title: String(profile?.title || "").trim() || null,
       country_code: extractCountryCodeFromUrl(profile?.country),
       blitz: extractChessComRating(stats, "chess_blitz"),
@@ -79,8 +85,7 @@ async function fetchChessComUser(username) {
       seenAt: safeTimestampMs(profile?.last_online)
     };
   } catch (error) {
-    console.warn(`warning: erro ao buscar Chess.com user ${username}: ${error.message}`);
-    return null;
+    return reportFetchFailure(`Chess.com user ${username}`, error, finalAttempt);
   }
 }
 
@@ -96,6 +101,7 @@ class CountryLeaderboardIndex {
       return {
         page,
         leaders: [],
+        leadersByUsername: EMPTY_LEADERS_BY_USERNAME,
         firstScore: 0,
         lastScore: 0
       };
@@ -124,9 +130,19 @@ class CountryLeaderboardIndex {
     });
 
     const leaders = Array.isArray(payload?.leaders) ? payload.leaders : [];
+    // O primeiro lider com o mesmo nome prevalece, como no find.
+    const leadersByUsername = new Map();
+    for (const leader of leaders) {
+      const username = getUsernameKey(leader?.user);
+      if (!leadersByUsername.has(username)) {
+        leadersByUsername.set(username, leader);
+      }
+    }
+
     const entry = {
       page,
       leaders,
+      leadersByUsername,
       firstScore: safeInt(leaders[0]?.score, 0),
       lastScore: safeInt(leaders[leaders.length - 1]?.score, 0)
     };
@@ -196,7 +212,6 @@ class CountryLeaderboardIndex {
   }
 
   async findPlayer(username, rating, upperBound) {
-    const targetUsername = String(username || "").trim().toLowerCase();
     const candidatePage = await this.findCandidatePage(rating, upperBound);
     const pagesToInspect = [];
 
@@ -213,9 +228,7 @@ class CountryLeaderboardIndex {
 
     for (const pageNumber of uniquePages) {
       const page = await this.getPage(pageNumber);
-      const match = page.leaders.find((leader) => {
-        return String(leader?.user?.username || "").trim().toLowerCase() === targetUsername;
-      });
+      const match = page.leadersByUsername.get(username);
 
       if (match) {
         return match;
@@ -230,7 +243,7 @@ async function enrichChessComCountryRanks(players) {
   const groups = new Map();
 
   for (const player of players) {
-    const username = String(player?.username || "").trim().toLowerCase();
+    const username = getUsernameKey(player);
     const countryCode = normalizeCountryCode(player?.country_code);
 
     if (!username || !countryCode) {
@@ -269,8 +282,8 @@ async function enrichChessComCountryRanks(players) {
     try {
       upperBound = await leaderboard.getUpperBound(minimumRating);
     } catch (error) {
-      console.warn(
-        `warning: erro ao preparar leaderboard ${group.countryCode}/${group.rhythm}: ${error.message}`
+      logWarning(
+        `erro ao preparar leaderboard ${group.countryCode}/${group.rhythm}: ${error.message}`
       );
       continue;
     }
@@ -294,8 +307,8 @@ async function enrichChessComCountryRanks(players) {
           target.player.country_name = String(user?.country_name || "").trim() || null;
         }
       } catch (error) {
-        console.warn(
-          `warning: erro localizando rank ${group.countryCode}/${group.rhythm}/${username}: ${error.message}`
+        logWarning(
+          `erro localizando rank ${group.countryCode}/${group.rhythm}/${username}: ${error.message}`
         );
       }
     }
@@ -306,15 +319,22 @@ async function enrichChessComCountryRanks(players) {
 
 export async function generateChessComData({
   docsDir,
-  writeFile = true
+  writeFile = true,
+  maxAgeMs = 0
 }) {
+  const outputPath = path.join(docsDir, "players_chesscom.json");
+  const freshPayload = maxAgeMs > 0 ? await readFreshPayload(outputPath, maxAgeMs) : null;
+  if (freshPayload) {
+    return freshPayload;
+  }
+
   const members = await fetchChessComClubMembers();
-  const results = await mapWithConcurrency(members, MAX_CONCURRENCY, fetchChessComUser);
+  const results = await mapWithRetryPass(members, MAX_CONCURRENCY, fetchChessComUser);
   const players = results.filter(Boolean);
 
   return finalizePlayers({
     players,
-    outputPath: path.join(docsDir, "players_chesscom.json"),
+    outputPath,
     writeFile,
     enrichPlayers: enrichChessComCountryRanks
   });
@@ -0,0 +1,61 @@
+import { createHash } from "node:crypto";
+import { mkdir, readFile, rename, writeFile } from "node:fs/promises";
+import path from "node:path";
+import { fileURLToPath } from "node:url";
+import { logWarning } from "./shared.mjs";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const CACHE_DIR = path.resolve(__dirname, "..", "..", ".cache", "http");
+// Incrementar quando o formato das entradas mudar invalida o cache antigo.
+const CACHE_SCHEMA_VERSION = 2;
+
+function getCachePath(key) {
+  const digest = createHash("sha1").update(key).digest("hex");
+  return path.join(CACHE_DIR, digest.slice(0, 2), `${digest}.cache`);
+}
+
+// Cada entrada: uma linha de cabecalho JSON seguida do corpo cru.
+export async function readCachedEntry(key) {
+  try {
+    const content = await readFile(getCachePath(key), "utf8");
+    const headerEnd = content.indexOf("\n");
+    if (headerEnd < 0) {
+      return null;
+    }
+
+    const header = JSON.parse(content.slice(0, headerEnd));
+    if (header?.version !== CACHE_SCHEMA_VERSION || header?.key !== key) {
+      return null;
+    }
+
+    return {
+      body: content.slice(headerEnd + 1),
+      ageMs: Date.now() - Number(header.storedAt),
+      etag: header.etag || null,
+      lastModified: header.lastModified || null
+    };
+  } catch {
+    return null;
+  }
+}
+
+export async function writeCachedText(key, body, { etag = null, lastModified = null } = {}) {
+  const cachePath = getCachePath(key);
+  const tempPath = `${cachePath}.${process.pid}.tmp`;
+  const header = JSON.stringify({
+    version: CACHE_SCHEMA_VERSION,
+    key,
+    storedAt: Date.now(),
+    etag,
+    lastModified
+  });
+
+  try {
+    await mkdir(path.dirname(cachePath), { recursive: true });
+    await writeFile(tempPath, `${header}\n${body}`, "utf8");
+    await rename(tempPath, cachePath);
+  } catch (error) {
+    logWarning(`erro gravando cache em disco para ${key}: ${error.message}`);
+  }
+}
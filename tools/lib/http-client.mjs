@@ -1,8 +1,45 @@
+import http2 from "node:http2";
 import https from "node:https";
-import { REQUEST_TIMEOUT_MS, sleep } from "./shared.mjs";
+import { pipeline } from "node:stream";
+import { StringDecoder } from "node:string_decoder";
+import tls from "node:tls";
+import zlib from "node:zlib";
+import { readCachedEntry, writeCachedText } from "./disk-cache.mjs";
+import {
+  MAX_CONCURRENCY,
+  MAX_RETRY_DELAY_MS,
+  REQUEST_TIMEOUT_MS,
+  isGoneError,
+  sleep
+} from "./shared.mjs";
 
-const KEEP_ALIVE_AGENT = new https.Agent({ keepAlive: true });
+const MAX_SOCKETS_PER_HOST = Math.max(32, MAX_CONCURRENCY * 4);
+const KEEP_ALIVE_IDLE_TIMEOUT_MS = 30_000;
+const KEEP_ALIVE_AGENT = new https.Agent({
+  keepAlive: true,
+  maxSockets: MAX_SOCKETS_PER_HOST,
+  maxFreeSockets: MAX_SOCKETS_PER_HOST,
+  timeout: KEEP_ALIVE_IDLE_TIMEOUT_MS,
+  scheduling: "lifo"
+});
 const RETRY_STATUS_CODES = new Set([429, 500, 502, 503, 504]);
+const MAX_RETRY_AFTER_MS = 90_000;
+const REDIRECT_STATUS_CODES = new Set([301, 302, 303, 307, 308]);
+// zstd so e anunciado quando o runtime sabe descomprimi-lo (Node 22.15+/23.8+).
+const SUPPORTS_ZSTD = typeof zlib.createZstdDecompress === "function";
+const DEFAULT_HEADERS = Object.freeze({
+  "User-Agent": "ranking-xadrez-jovem/2.0",
+  "Accept-Encoding": SUPPORTS_ZSTD ? "zstd, br, gzip, deflate" : "gzip, deflate, br"
+});
+// www.chess.com (leaderboard) fica em HTTP/1.1.
+const HTTP2_ORIGINS = new Set(["https://lichess.org", "https://api.chess.com"]);
+const HTTP2_STREAM_WINDOW_SIZE = 1024 * 1024;
+const HTTP2_SESSION_WINDOW_SIZE = 16 * 1024 * 1024;
+const HTTP2_TCP_KEEPALIVE_DELAY_MS = 15_000;
+const http2Sessions = new Map();
+const http2DisabledOrigins = new Set();
+const http2TlsSessions = new Map();
+const originCooldownUntil = new Map();
 
 function createHttpError(message, statusCode) {
   const error = new Error(message);
@@ -10,6 +47,129 @@ function createHttpError(message, statusCode) {
   return error;
 }
 
+function pipeDecoder(response, decoder, onError) {
+  return pipeline(response, decoder, (error) => {
+    if (error) {
+      onError(error);
+    }
+  });
+}
+
+function decodeResponseStream(response, contentEncoding, onError) {
+  const encoding = String(contentEncoding || "").trim().toLowerCase();
+
+  if (encoding === "gzip") {
+    return pipeDecoder(response, zlib.createGunzip(), onError);
+  }
+
+  if (encoding === "deflate") {
+    return pipeDecoder(response, zlib.createInflate(), onError);
+  }
+
+  if (encoding === "br") {
+    return pipeDecoder(response, zlib.createBrotliDecompress(), onError);
+  }
+
+  if (encoding === "zstd" && SUPPORTS_ZSTD) {
+    return pipeDecoder(response, zlib.createZstdDecompress(), onError);
+  }
+
+  return response;
+}
+
+function createTextCollector() {
+  const chunks = [];
+
+  return {
+    write(chunk) {
+      chunks.push(chunk);
+    },
+    finish() {
+      return Buffer.concat(chunks).toString("utf8");
+    }
+  };
+}
+
+function createLineCollector(onLine) {
+  const decoder = new StringDecoder("utf8");
+  let pending = "";
+  let lineCount = 0;
+
+  const emit = (rawLine) => {
+    const line = rawLine.trim();
+    if (line) {
+      lineCount += 1;
+      onLine(line);
+    }
+  };
+
+  return {
+    write(chunk) {
+      pending += decoder.write(chunk);
+      let start = 0;
+      let newlineIndex = pending.indexOf("\n", start);
+
+      while (newlineIndex !== -1) {
+        emit(pending.slice(start, newlineIndex));
+        start = newlineIndex + 1;
+        newlineIndex = pending.indexOf("\n", start);
+      }
+
+      pending = pending.slice(start);
+    },
+    finish() {
+      emit(pending + decoder.end());
+      pending = "";
+      return lineCount;
+    }
+  };
+}
+
+function parseRetryAfterMs(value) {
+  if (value === undefined || value === null || value === "") {
+    return null;
+  }
+
+  const seconds = Number(value);
+  if (Number.isFinite(seconds)) {
+    return Math.max(0, seconds * 1000);
+  }
+
+  const date = Date.parse(String(value));
+  return Number.isFinite(date) ? Math.max(0, date - Date.now()) : null;
+}
+
+function readResponseBody(url, source, statusCode, responseHeaders, options, resolve, reject) {
+  if (statusCode < 200 || statusCode >= 300) {
+    source.resume();
+    const error = createHttpError(`HTTP ${statusCode} para ${url}`, statusCode);
+    error.retryAfterMs = parseRetryAfterMs(responseHeaders["retry-after"]);
+    reject(error);
+    return;
+  }
+
+  options.onHeaders?.(responseHeaders);
+  const collector = options.createCollector ? options.createCollector() : createTextCollector();
+  const decoded = decodeResponseStream(source, responseHeaders["content-encoding"], reject);
+
+  decoded.on("data", (chunk) => {
+    try {
+      collector.write(chunk);
+    } catch (error) {
+      source.destroy();
+      reject(error);
+    }
+  });
+  decoded.on("error", reject);
+  decoded.on("end", () => {
+    try {
+      resolve(collector.finish());
+    } catch (error) {
+      reject(error);
+    }
+  });
+}
+
 function resolveRedirectLocation(baseUrl, location) {
   try {
     return new URL(location, baseUrl).toString();
@@ -18,26 +178,29 @@ function resolveRedirectLocation(baseUrl, location) {
   }
 }
 
-function doRequest(url, options = {}) {
+function doHttp1Request(url, options = {}) {
   const {
     headers = {},
+    method = "GET",
+    body = null,
     timeoutMs = REQUEST_TIMEOUT_MS
   } = options;
 
   return new Promise((resolve, reject) => {
-    const request = https.get(
+    const request = https.request(
       url,
       {
+        method,
         agent: KEEP_ALIVE_AGENT,
         headers: {
-          "User-Agent": "ranking-xadrez-jovem/2.0",
+          ...DEFAULT_HEADERS,
           ...headers
         }
       },
       (response) => {
         const { statusCode = 500, headers: responseHeaders = {} } = response;
 
-        if ([301, 302, 303, 307, 308].includes(statusCode) && responseHeaders.location) {
+        if (REDIRECT_STATUS_CODES.has(statusCode) && responseHeaders.location) {
           response.resume();
           const redirectedUrl = resolveRedirectLocation(url, responseHeaders.location);
           if (!redirectedUrl) {
@@ -48,19 +211,15 @@ function doRequest(url, options = {}) {
           return;
         }
 
-        let body = "";
-        response.setEncoding("utf8");
-        response.on("data", (chunk) => {
-          body += chunk;
-        });
-        response.on("end", () => {
-          if (statusCode < 200 || statusCode >= 300) {
-            reject(createHttpError(`HTTP ${statusCode} para ${url}`, statusCode));
-            return;
-          }
-
-          resolve(body);
-        });
+        readResponseBody(
+          url,
+          response,
+          statusCode,
+          responseHeaders,
+          options,
+          resolve,
+          reject
+        );
       }
     );
 
@@ -69,24 +228,200 @@ function doRequest(url, options = {}) {
     });
 
     request.on("error", reject);
+    request.end(body ?? undefined);
   });
 }
 
-export async function requestText(url, options = {}) {
+function createHttp2Socket(origin) {
+  const { hostname, port } = new URL(origin);
+  const socket = tls.connect({
+    host: hostname,
+    port: Number(port) || 443,
+    servername: hostname,
+    ALPNProtocols: ["h2"],
+    session: http2TlsSessions.get(origin)
+  });
+  socket.setKeepAlive(true, HTTP2_TCP_KEEPALIVE_DELAY_MS);
+
+  socket.on("session", (ticket) => {
+    http2TlsSessions.set(origin, ticket);
+  });
+
+  return socket;
+}
+
+function acquireHttp2Session(origin) {
+  let entry = http2Sessions.get(origin);
+
+  if (!entry || entry.session.closed || entry.session.destroyed) {
+    const session = http2.connect(origin, {
+      settings: { initialWindowSize: HTTP2_STREAM_WINDOW_SIZE },
+      createConnection: () => createHttp2Socket(origin)
+    });
+    entry = { session, activeStreams: 0, established: false };
+
+    session.once("connect", (_, socket) => {
+      if (socket.alpnProtocol !== "h2") {
+        session.destroy(new Error(`${origin} não negociou HTTP/2`));
+        return;
+      }
+
+      entry.established = true;
+      session.setLocalWindowSize(HTTP2_SESSION_WINDOW_SIZE);
+    });
+
+    const forget = () => {
+      if (http2Sessions.get(origin) === entry) {
+        http2Sessions.delete(origin);
+      }
+    };
+
+    session.on("error", forget);
+    session.on("goaway", forget);
+    session.on("close", forget);
+    session.unref();
+    http2Sessions.set(origin, entry);
+  }
+
+  entry.activeStreams += 1;
+  entry.session.ref();
+
+  return {
+    session: entry.session,
+    get established() {
+      return entry.established;
+    },
+    release() {
+      entry.activeStreams -= 1;
+      if (entry.activeStreams === 0 && !entry.session.destroyed) {
+        entry.session.unref();
+      }
+    }
+  };
+}
+
+function doHttp2Request(url, options = {}) {
+  const {
+    headers = {},
+    method = "GET",
+    body = null,
+    timeoutMs = REQUEST_TIMEOUT_MS
+  } = options;
+  const target = new URL(url);
+
+  return new Promise((resolve, settleReject) => {
+    let lease;
+    let stream;
+
+    // Falha antes de a sessao h2 se estabelecer: doRequest cai para HTTP/1.1.
+    const reject = (error) => {
+      if (error && lease && !lease.established && !error.statusCode) {
+        error.http2Unavailable = true;
+      }
+      settleReject(error);
+    };
+
+    try {
+      lease = acquireHttp2Session(target.origin);
+      stream = lease.session.request({
+        ...DEFAULT_HEADERS,
+        ...headers,
+        ":method": method,
+        ":path": `${target.pathname}${target.search}`
+      });
+    } catch (error) {
+      reject(error);
+      lease?.release();
+      return;
+    }
+
+    stream.on("close", () => lease.release());
+    stream.on("error", reject);
+    stream.setTimeout(timeoutMs, () => {
+      stream.close(http2.constants.NGHTTP2_CANCEL);
+      reject(createHttpError(`Timeout para ${url}`, 408));
+    });
+
+    stream.on("response", (responseHeaders) => {
+      const statusCode = Number(responseHeaders[":status"]) || 500;
+
+      if (REDIRECT_STATUS_CODES.has(statusCode) && responseHeaders.location) {
+        stream.resume();
+        const redirectedUrl = resolveRedirectLocation(url, responseHeaders.location);
+        if (!redirectedUrl) {
+          reject(createHttpError(`Redirecionamento inválido para ${url}`, statusCode));
+          return;
+        }
+        resolve(doRequest(redirectedUrl, options));
+        return;
+      }
+
+      readResponseBody(
+        url,
+        stream,
+        statusCode,
+        responseHeaders,
+        options,
+        resolve,
+        reject
+      );
+    });
+
+    stream.end(body ?? undefined);
+  });
+}
+
+async function doRequest(url, options = {}) {
+  const { origin } = new URL(url);
+
+  if (!HTTP2_ORIGINS.has(origin) || http2DisabledOrigins.has(origin)) {
+    return doHttp1Request(url, options);
+  }
+
+  try {
+    return await doHttp2Request(url, options);
+  } catch (error) {
+    if (error?.http2Unavailable) {
+      http2DisabledOrigins.add(origin);
+      return doHttp1Request(url, options);
+    }
+
+    throw error;
+  }
+}
+
+async function requestWithRetries(url, options = {}) {
   const {
     retries = 3,
     retryDelayMs = 350,
+    maxRetryDelayMs = MAX_RETRY_DELAY_MS,
     retryOnStatusCodes = []
   } = options;
 
   let lastError;
   const retryableStatuses = new Set([...RETRY_STATUS_CODES, ...retryOnStatusCodes]);
+  const { origin } = new URL(url);
 
   for (let attempt = 1; attempt <= retries; attempt += 1) {
+    const cooldownMs = (originCooldownUntil.get(origin) ?? 0) - Date.now();
+    if (cooldownMs > 0) {
+      await sleep(cooldownMs);
+    }
+
     try {
       return await doRequest(url, options);
     } catch (error) {
       lastError = error;
+
+      const backoffMs = Math.min(retryDelayMs * 2 ** (attempt - 1), maxRetryDelayMs);
+      const serverDelayMs = Math.min(error?.retryAfterMs ?? 0, MAX_RETRY_AFTER_MS);
+      const delayMs = Math.max(serverDelayMs, Math.random() * backoffMs);
+
+      if (error?.statusCode === 429) {
+        const until = Date.now() + delayMs;
+        originCooldownUntil.set(origin, Math.max(originCooldownUntil.get(origin) ?? 0, until));
+      }
+
       const shouldRetry =
         attempt < retries &&
         (retryableStatuses.has(error?.statusCode) || !error?.statusCode);
@@ -95,13 +430,77 @@ export async function requestText(url, options = {}) {
         throw error;
       }
 
-      await sleep(retryDelayMs * attempt);
+      await sleep(delayMs);
     }
   }
 
   throw lastError;
 }
 
+export async function requestText(url, options = {}) {
+  const {
+    cacheTtlMs = 0,
+    staleTtlMs = cacheTtlMs,
+    method = "GET",
+    revalidate = false
+  } = options;
+  const useCache = cacheTtlMs > 0 && method === "GET";
+  const cached = useCache ? await readCachedEntry(url) : null;
+
+  if (cached && !revalidate && cached.ageMs <= cacheTtlMs) {
+    return cached.body;
+  }
+
+  const conditionalHeaders = {};
+  if (cached?.etag) {
+    conditionalHeaders["If-None-Match"] = cached.etag;
+  }
+  if (cached?.lastModified) {
+    conditionalHeaders["If-Modified-Since"] = cached.lastModified;
+  }
+
+  let text;
+  let validators = {};
+  try {
+    text = await requestWithRetries(url, {
+      ...options,
+      headers: { ...options.headers, ...conditionalHeaders },
+      onHeaders: (responseHeaders) => {
+        validators = {
+          etag: responseHeaders.etag || null,
+          lastModified: responseHeaders["last-modified"] || null
+        };
+      }
+    });
+  } catch (error) {
+    if (cached && error?.statusCode === 304) {
+      await writeCachedText(url, cached.body, cached);
+      return cached.body;
+    }
+
+    // Stale-if-error; conta removida (404/410) nao reaproveita a copia.
+    if (cached && cached.ageMs <= staleTtlMs && !isGoneError(error)) {
+      return cached.body;
+    }
+
+    throw error;
+  }
+
+  if (useCache) {
+    await writeCachedText(url, text, validators);
+  }
+
+  return text;
+}
+
+export async function requestLines(url, onLine, options = {}) {
+  // Em caso de retry, linhas ja entregues podem se repetir.
+  return requestWithRetries(url, {
+    ...options,
+    createCollector: () => createLineCollector(onLine)
+  });
+}
+
 export async function requestJson(url, options = {}) {
   const text = await requestText(url, options);
   try {
@@ -1,10 +1,20 @@
 import path from "node:path";
-import { finalizePlayers } from "./ranking-builder.mjs";
-import { requestJson, requestText } from "./http-client.mjs";
+import { finalizePlayers, readFreshPayload, readPreviousPlayers } from "./ranking-builder.mjs";
+import { requestJson, requestLines, requestText } from "./http-client.mjs";
 import {
+  LICHESS_MAX_CONCURRENCY,
   MAX_CONCURRENCY,
-  mapWithConcurrency,
-  parseJsonLines,
+  REQUEST_TIMEOUT_MS,
+  USER_CACHE_STALE_TTL_MS,
+  USER_CACHE_TTL_MS,
+  chunkItems,
+  createLimiter,
+  encodeUsernamePath,
+  getActiveCutoffMs,
+  getUsernameKey,
+  logWarning,
+  mapWithRetryPass,
+  reportFetchFailure,
   safeInt,
   safeTimestampMs
 } from "./shared.mjs";
@@ -12,6 +22,17 @@ import {
 const LICHESS_TEAM_ID = "xadrezjovemes";
 const LICHESS_TEAM_URL = `https://lichess.org/api/team/${encodeURIComponent(LICHESS_TEAM_ID)}/users`;
 const LICHESS_USER_URL = "https://lichess.org/api/user/";
+const LICHESS_USERS_BULK_URL = "https://lichess.org/api/users";
+const LICHESS_USERS_BATCH_SIZE = 300;
+const LICHESS_TEAM_FULL_LIMIT = 1_000;
+const LICHESS_HISTORY_RHYTHMS = [
+  ["Blitz", "blitz"],
+  ["Bullet", "bullet"],
+  ["Rapid", "rapid"]
+];
+const EMPTY_OBJECT = Object.freeze({});
+const EMPTY_PREVIOUS_PLAYERS = new Map();
+const TEAM_MEMBER_ID_PATTERN = /^\{\s*"id"\s*:\s*"([^"\\]+)"/;
 
 function extractRealName(profile, user) {
   const source = profile || {};
@@ -34,119 +55,346 @@ function extractRealName(profile, user) {
   ).trim();
 }
 
-async function fetchLichessTeamMembers() {
-  const text = await requestText(LICHESS_TEAM_URL);
-  const trimmed = text.trim();
+function addTeamMember(item, members, usersById, onUser) {
+  const username = item?.id || item?.username;
+  if (!username) {
+    return;
+  }
 
-  if (!trimmed) {
-    return [];
+  members.add(username);
+  if (item?.perfs) {
+    usersById.set(String(username).toLowerCase(), item);
+    onUser?.(username, item);
   }
+}
 
-  if (trimmed.startsWith("[")) {
-    const payload = JSON.parse(trimmed);
-    return payload
-      .map((item) => item?.id || item?.username)
-      .filter(Boolean);
+function readTeamLine(line, members, usersById, onUser) {
+  const match = line.includes('"perfs"') ? null : TEAM_MEMBER_ID_PATTERN.exec(line);
+  if (match) {
+    members.add(match[1]);
+    return;
   }
 
-  return parseJsonLines(trimmed)
-    .map((entry) => {
-      if (typeof entry === "string") {
-        return entry;
-      }
+  try {
+    addTeamMember(JSON.parse(line), members, usersById, onUser);
+  } catch {
+    logWarning(`linha inválida na lista do time Lichess: ${line.slice(0, 80)}`);
+  }
+}
 
-      return entry?.id || entry?.username || entry?.name;
-    })
-    .filter(Boolean);
+async function streamLichessTeam(url, members, usersById, onUser) {
+  await requestLines(
+    url,
+    (line) => readTeamLine(line, members, usersById, onUser),
+    { headers: { Accept: "application/x-ndjson" } }
+  );
 }
 
-async function fetchLichessRatingHistory(username) {
-  try {
-    const history = await requestJson(
-      `${LICHESS_USER_URL}${encodeURIComponent(username)}/rating-history`
-    );
+async function fetchLichessTeamMembers(onUser) {
+  const members = new Set();
+  const usersById = new Map();
 
-    const result = {
-      blitz: { diff: null, peak: null },
-      bullet: { diff: null, peak: null },
-      rapid: { diff: null, peak: null }
-    };
+  await streamLichessTeam(`${LICHESS_TEAM_URL}?full=true`, members, usersById, onUser);
 
-    for (const record of history || []) {
-      const name = String(record?.name || "").toLowerCase();
-      if (!(name in result)) {
-        continue;
-      }
+  // Com full=true o Lichess corta a lista em 1000 membros.
+  if (members.size >= LICHESS_TEAM_FULL_LIMIT) {
+    await streamLichessTeam(LICHESS_TEAM_URL, members, usersById);
+  }
 
-      const points = Array.isArray(record?.points) ? record.points : [];
-      const ratings = points
-        .map((point) => safeInt(point?.[3], null))
-        .filter((rating) => Number.isFinite(rating));
+  return { members: [...members], usersById };
+}
 
-      if (!ratings.length) {
-        continue;
-      }
+function createEmptyRatingHistory() {
+  return {
+    blitz: { diff: null, peak: null },
+    bullet: { diff: null, peak: null },
+    rapid: { diff: null, peak: null }
+  };
+}
 
-      result[name].peak = Math.max(...ratings);
+function summarizeRatingPoints(points) {
+  const ratings = (Array.isArray(points) ? points : [])
+    .map((point) => safeInt(point?.[3], null))
+    .filter((rating) => Number.isFinite(rating));
 
-      if (ratings.length >= 2) {
-        result[name].diff = ratings[ratings.length - 1] - ratings[ratings.length - 2];
-      } else {
-        result[name].diff = 0;
-      }
+  if (!ratings.length) {
+    return null;
+  }
+
+  return {
+    diff: ratings.length >= 2 ? ratings[ratings.length - 1] - ratings[ratings.length - 2] : 0,
+    peak: Math.max(...ratings)
+  };
+}
+
+function extractRatingPointsSegment(text, rhythm) {
+  // Recorta so o array de pontos do ritmo em vez de parsear o historico inteiro.
+  const marker = `{"name":"${rhythm}","points":[`;
+  const markerIndex = text.indexOf(marker);
+  if (markerIndex < 0) {
+    return null;
+  }
+
+  const pointsStart = markerIndex + marker.length - 1;
+  if (text.startsWith("[]", pointsStart)) {
+    return "[]";
+  }
+
+  const pointsEnd = text.indexOf("]]", pointsStart);
+  return pointsEnd < 0 ? undefined : text.slice(pointsStart, pointsEnd + 2);
+}
+
+function parseRatingHistory(text) {
+  const result = createEmptyRatingHistory();
+
+  if (text.startsWith('[{"name":"')) {
+    const segments = LICHESS_HISTORY_RHYTHMS.map(([rhythm]) =>
+      extractRatingPointsSegment(text, rhythm)
+    );
+
+    // Um recorte incompleto indica formato inesperado: cai no parse completo.
+    if (!segments.includes(undefined)) {
+      LICHESS_HISTORY_RHYTHMS.forEach(([, key], index) => {
+        const summary = segments[index] ? summarizeRatingPoints(JSON.parse(segments[index])) : null;
+        if (summary) {
+          result[key] = summary;
+        }
+      });
+      return result;
     }
+  }
 
-    return result;
+  for (const record of JSON.parse(text || "[]") || []) {
+    const name = String(record?.name || "").toLowerCase();
+    if (!(name in result)) {
+      continue;
+    }
+
+    const summary = summarizeRatingPoints(record?.points);
+    if (summary) {
+      result[name] = summary;
+    }
+  }
+
+  return result;
+}
+
+async function fetchLichessRatingHistory(userUrl, { revalidate = false } = {}) {
+  try {
+    const text = await requestText(`${userUrl}/rating-history`, {
+      cacheTtlMs: USER_CACHE_TTL_MS,
+      staleTtlMs: USER_CACHE_STALE_TTL_MS,
+      revalidate
+    });
+    return parseRatingHistory(text);
   } catch {
-    return {
-      blitz: { diff: null, peak: null },
-      bullet: { diff: null, peak: null },
-      rapid: { diff: null, peak: null }
-    };
+    return createEmptyRatingHistory();
   }
 }
 
-async function fetchLichessUser(username) {
+function pickLichessUserFields(username, user) {
+  const profile = user?.profile || EMPTY_OBJECT;
+  const perfs = user?.perfs || EMPTY_OBJECT;
+
+  return {
+    username,
+    name: extractRealName(profile, user),
+    title: user?.title || null,
+    country_code: profile.flag || null,
+    blitz: safeInt(perfs.blitz?.rating, null),
+    bullet: safeInt(perfs.bullet?.rating, null),
+    rapid: safeInt(perfs.rapid?.rating, null),
+    // Contagem de partidas ausente conta como "pode ter jogado".
+    hasRatingHistory: LICHESS_HISTORY_RHYTHMS.some(([, key]) => perfs[key]?.games !== 0),
+    seenAt: safeTimestampMs(user?.seenAt || user?.lastSeenAt || user?.seenAtMillis)
+  };
+}
+
+async function fetchLichessUsersBatch(usernames, { finalAttempt = true } = {}) {
   try {
-    const user = await requestJson(`${LICHESS_USER_URL}${encodeURIComponent(username)}`);
-    const profile = user?.profile || {};
-    const perfs = user?.perfs || {};
-    const ratingHistory = await fetchLichessRatingHistory(username);
-
-    return {
-      username,
-      name: extractRealName(profile, user),
-      profile: profile.url || `https://lichess.org/@/${username}`,
-      title: user?.title || null,
-      country_code: profile.flag || null,
-      blitz: perfs?.blitz?.rating ?? null,
-      bullet: perfs?.bullet?.rating ?? null,
-      rapid: perfs?.rapid?.rating ?? null,
-      blitz_peak: Math.max(perfs?.blitz?.rating ?? 0, ratingHistory.blitz.peak ?? 0) || null,
-      bullet_peak: Math.max(perfs?.bullet?.rating ?? 0, ratingHistory.bullet.peak ?? 0) || null,
-      rapid_peak: Math.max(perfs?.rapid?.rating ?? 0, ratingHistory.rapid.peak ?? 0) || null,
-      seenAt: safeTimestampMs(user?.seenAt || user?.lastSeenAt || user?.seenAtMillis),
-      recent_blitz_diff: ratingHistory.blitz.diff,
-      recent_bullet_diff: ratingHistory.bullet.diff,
-      recent_rapid_diff: ratingHistory.rapid.diff
-    };
+    const users = await requestJson(LICHESS_USERS_BULK_URL, {
+      method: "POST",
+      body: usernames.join(","),
+      headers: { "Content-Type": "text/plain" },
+      timeoutMs: REQUEST_TIMEOUT_MS * 2
+    });
+    return Array.isArray(users) ? users : [];
   } catch (error) {
-    console.warn(`warning: erro ao buscar Lichess user ${username}: ${error.message}`);
+    if (finalAttempt) {
+      logWarning(`erro ao buscar lote de ${usernames.length} usuarios Lichess: ${error.message}`);
+    }
     return null;
   }
 }
 
+async function fetchLichessUsersByUsername(members, usersByUsername, limit) {
+  const missing = members.filter((username) => !usersByUsername.has(username.toLowerCase()));
+
+  const batches = await mapWithRetryPass(
+    chunkItems(missing, LICHESS_USERS_BATCH_SIZE),
+    MAX_CONCURRENCY,
+    (usernames, attempt) => limit(() => fetchLichessUsersBatch(usernames, attempt))
+  );
+
+  for (const users of batches) {
+    for (const user of users || []) {
+      const key = String(user?.id || user?.username || "").trim().toLowerCase();
+      if (key) {
+        usersByUsername.set(key, user);
+      }
+    }
+  }
+
+  return usersByUsername;
+}
+
+function createPreviousRatingHistory(previous) {
+  return {
+    blitz: { diff: null, peak: safeInt(previous.blitz_peak, null) },
+    bullet: { diff: null, peak: safeInt(previous.bullet_peak, null) },
+    rapid: { diff: null, peak: safeInt(previous.rapid_peak, null) }
+  };
+}
+
+async function buildLichessPlayer(userUrl, fields, previous) {
+  // Mesmo seenAt do arquivo anterior: nao jogou desde entao, historico e picos nao mudaram.
+  let ratingHistory;
+  if (!fields.hasRatingHistory) {
+    ratingHistory = createEmptyRatingHistory();
+  } else if (previous && safeInt(previous.seenAt, null) === fields.seenAt) {
+    ratingHistory = createPreviousRatingHistory(previous);
+  } else {
+    // seenAt mudou desde o arquivo anterior: o historico em cache pode estar velho.
+    ratingHistory = await fetchLichessRatingHistory(userUrl, { revalidate: Boolean(previous) });
+  }
+
+  return {
+    username: fields.username,
+    name: fields.name,
+    title: fields.title,
+    country_code: fields.country_code,
+    blitz: fields.blitz,
+    bullet: fields.bullet,
+    rapid: fields.rapid,
+    blitz_peak: Math.max(fields.blitz ?? 0, ratingHistory.blitz.peak ?? 0) || null,
+    bullet_peak: Math.max(fields.bullet ?? 0, ratingHistory.bullet.peak ?? 0) || null,
+    rapid_peak: Math.max(fields.rapid ?? 0, ratingHistory.rapid.peak ?? 0) || null,
+    seenAt: fields.seenAt,
+    recent_blitz_diff: ratingHistory.blitz.diff,
+    recent_bullet_diff: ratingHistory.bullet.diff,
+    recent_rapid_diff: ratingHistory.rapid.diff
+  };
+}
+
+async function fetchLichessUser(
+  username,
+  prefetchedUser = null,
+  {
+    finalAttempt = true,
+    activeCutoffMs = getActiveCutoffMs(),
+    previousByUsername = EMPTY_PREVIOUS_PLAYERS
+  } = {}
+) {
+  const userUrl = `${LICHESS_USER_URL}${encodeUsernamePath(username)}`;
+
+  try {
+    const user =
+      prefetchedUser ||
+      (await requestJson(userUrl, {
+        cacheTtlMs: USER_CACHE_TTL_MS,
+        staleTtlMs: USER_CACHE_STALE_TTL_MS
+      }));
+
+    const fields = pickLichessUserFields(username, user);
+
+    if (fields.seenAt === null || fields.seenAt < activeCutoffMs) {
+      return false;
+    }
+
+    return await buildLichessPlayer(
+      userUrl,
+      fields,
+      previousByUsername.get(username.toLowerCase())
+    );
+  } catch (error) {
+    return reportFetchFailure(`Lichess user ${username}`, error, finalAttempt);
+  }
+}
+
 export async function generateLichessData({
   docsDir,
-  writeFile = true
+  writeFile = true,
+  maxAgeMs = 0
 }) {
-  const members = await fetchLichessTeamMembers();
-  const results = await mapWithConcurrency(members, MAX_CONCURRENCY, fetchLichessUser);
+  const outputPath = path.join(docsDir, "players.json");
+  const freshPayload = maxAgeMs > 0 ? await readFreshPayload(outputPath, maxAgeMs) : null;
+  if (freshPayload) {
+    return freshPayload;
+  }
+
+  const activeCutoffMs = getActiveCutoffMs();
+  const limit = createLimiter(LICHESS_MAX_CONCURRENCY);
+  const earlyResults = new Map();
+  // Sem gravacao (--stdout) nao ha arquivo anterior: as variacoes vem do historico.
+  const previousByUsername = new Map();
+  if (writeFile) {
+    for (const player of await readPreviousPlayers(outputPath)) {
+      previousByUsername.set(getUsernameKey(player), player);
+    }
+  }
+
+  let teamStreamFailed = false;
+  const onUser = (username, user) => {
+    const key = username.toLowerCase();
+    if (!earlyResults.has(key)) {
+      earlyResults.set(
+        key,
+        limit(() =>
+          teamStreamFailed
+            ? null
+            : fetchLichessUser(username, user, {
+                finalAttempt: false,
+                activeCutoffMs,
+                previousByUsername
+              })
+        )
+      );
+    }
+  };
+
+  let members;
+  let usersById;
+  try {
+    ({ members, usersById } = await fetchLichessTeamMembers(onUser));
+  } catch (error) {
+    // Buscas antecipadas na fila nao saem; as em andamento terminam antes do erro.
+    teamStreamFailed = true;
+    await Promise.allSettled(earlyResults.values());
+    throw error;
+  }
+
+  const usersByUsername = await fetchLichessUsersByUsername(members, usersById, limit);
+  const results = await mapWithRetryPass(members, LICHESS_MAX_CONCURRENCY, (username, attempt) => {
+    const key = username.toLowerCase();
+    const earlyResult = earlyResults.get(key);
+    if (earlyResult) {
+      earlyResults.delete(key);
+      return earlyResult;
+    }
+
+    return limit(() =>
+      fetchLichessUser(username, usersByUsername.get(key), {
+        ...attempt,
+        activeCutoffMs,
+        previousByUsername
+      })
+    );
+  });
   const players = results.filter(Boolean);
 
   return finalizePlayers({
     players,
-    outputPath: path.join(docsDir, "players.json"),
+    outputPath,
     writeFile
   });
 }
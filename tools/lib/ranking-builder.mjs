@@ -1,21 +1,51 @@
-import { mkdir, readFile, writeFile } from "node:fs/promises";
+import { mkdir, readFile, rename, writeFile } from "node:fs/promises";
 import path from "node:path";
+import { readCachedEntry, writeCachedText } from "./disk-cache.mjs";
 import {
-  activeSinceDays,
+  SPECIAL_TITLE_OVERRIDES,
   dedupePlayers,
-  initPlayerMetadata,
+  getActiveCutoffMs,
+  getUsernameKey,
+  normalizeCountryCode,
   ratingStatus,
   safeInt
 } from "./shared.mjs";
 
-async function readPreviousPlayers(outputPath) {
-  try {
-    const text = await readFile(outputPath, "utf8");
-    const payload = JSON.parse(text);
-    return Array.isArray(payload?.players) ? payload.players : [];
-  } catch {
-    return [];
+// Parse do arquivo anterior (com o texto cru) por caminho, ate a proxima gravacao.
+const previousFiles = new Map();
+
+function readPreviousFile(outputPath) {
+  let request = previousFiles.get(outputPath);
+  if (!request) {
+    request = readFile(outputPath, "utf8")
+      .then((text) => ({ text, payload: JSON.parse(text) }))
+      .catch(() => null);
+    previousFiles.set(outputPath, request);
   }
+
+  return request;
+}
+
+export async function readPreviousPlayers(outputPath) {
+  const payload = (await readPreviousFile(outputPath))?.payload;
+  return Array.isArray(payload?.players) ? payload.players : [];
+}
+
+// Ultima verificacao de um snapshot inalterado: fica no cache local, fora do commit.
+function getSnapshotCheckKey(outputPath) {
+  return `snapshot-check:${path.resolve(outputPath)}`;
+}
+
+export async function readFreshPayload(outputPath, maxAgeMs) {
+  const payload = (await readPreviousFile(outputPath))?.payload;
+  let ageMs = Date.now() - Number(payload?.generated_at);
+
+  const check = await readCachedEntry(getSnapshotCheckKey(outputPath));
+  if (check && Number(check.body) === payload?.generated_at) {
+    ageMs = Math.min(ageMs, check.ageMs);
+  }
+
+  return Array.isArray(payload?.players) && ageMs >= 0 && ageMs <= maxAgeMs ? payload : null;
 }
 
 function buildPreviousMaps(previousPlayers) {
@@ -23,7 +53,7 @@ function buildPreviousMaps(previousPlayers) {
   const previousRankByUsername = new Map();
 
   previousPlayers.forEach((player, index) => {
-    const username = String(player?.username || "").trim().toLowerCase();
+    const username = getUsernameKey(player);
     if (!username) {
       return;
     }
@@ -35,54 +65,103 @@ function buildPreviousMaps(previousPlayers) {
   return { previousByUsername, previousRankByUsername };
 }
 
+// A URL do perfil nao e gravada: o site a deriva do username.
+function createPlayerRecord(player, username, previous, position, previousPosition) {
+  const explicitTitle = String(player?.title || "").trim().toUpperCase();
+  const hasDiffBase = Boolean(previous);
+  const blitzDiff = hasDiffBase
+    ? (player.blitz ?? 0) - safeInt(previous.blitz)
+    : (player.recent_blitz_diff ?? 0);
+  const bulletDiff = hasDiffBase
+    ? (player.bullet ?? 0) - safeInt(previous.bullet)
+    : (player.recent_bullet_diff ?? 0);
+  const rapidDiff = hasDiffBase
+    ? (player.rapid ?? 0) - safeInt(previous.rapid)
+    : (player.recent_rapid_diff ?? 0);
+  const positionChange = previousPosition ? previousPosition - position : null;
+
+  return {
+    username: player.username,
+    name: String(player?.name || "").trim() ? player.name : "Sem nome registrado",
+    title: SPECIAL_TITLE_OVERRIDES[username] || explicitTitle || null,
+    country_code: normalizeCountryCode(player?.country_code),
+    blitz: player.blitz,
+    bullet: player.bullet,
+    rapid: player.rapid,
+    blitz_peak: player.blitz_peak,
+    bullet_peak: player.bullet_peak,
+    rapid_peak: player.rapid_peak,
+    seenAt: player.seenAt,
+    country_name: String(player?.country_name || "").trim() || null,
+    blitz_country_rank: player.blitz_country_rank ?? null,
+    bullet_country_rank: player.bullet_country_rank ?? null,
+    rapid_country_rank: player.rapid_country_rank ?? null,
+    blitz_diff: blitzDiff,
+    bullet_diff: bulletDiff,
+    rapid_diff: rapidDiff,
+    position,
+    position_change: positionChange,
+    position_arrow:
+      positionChange === null
+        ? null
+        : positionChange > 0
+          ? "\u25B2"
+          : positionChange < 0
+            ? "\u25BC"
+            : "\u2192",
+    blitz_status: ratingStatus(blitzDiff),
+    bullet_status: ratingStatus(bulletDiff),
+    rapid_status: ratingStatus(rapidDiff)
+  };
+}
+
 function enrichWithDeltasAndPositions(players, previousPlayers) {
   const { previousByUsername, previousRankByUsername } = buildPreviousMaps(previousPlayers);
 
-  for (const player of players) {
-    initPlayerMetadata(player);
+  players.forEach((player, index) => {
+    const username = getUsernameKey(player);
+    players[index] = createPlayerRecord(
+      player,
+      username,
+      previousByUsername.get(username),
+      index + 1,
+      previousRankByUsername.get(username)
+    );
+  });
+}
 
-    if (!String(player?.name || "").trim()) {
-      player.name = "Sem nome registrado";
-    }
+// Ratings cabem em 12 bits: os tres ritmos formam uma chave de 36 bits, exata em double.
+const RATING_KEY_RADIX = 4_096;
+
+function packRating(rating) {
+  return Math.min(Math.max(rating ?? 0, 0), RATING_KEY_RADIX - 1);
+}
+
+function sortActiveByRatings(players) {
+  const cutoffMs = getActiveCutoffMs();
+  const active = [];
+  const keys = new Float64Array(players.length);
 
-    const username = String(player?.username || "").trim().toLowerCase();
-    const previous = previousByUsername.get(username);
-
-    if (previous) {
-      player.blitz_diff = safeInt(player.blitz) - safeInt(previous.blitz);
-      player.bullet_diff = safeInt(player.bullet) - safeInt(previous.bullet);
-      player.rapid_diff = safeInt(player.rapid) - safeInt(previous.rapid);
-    } else {
-      player.blitz_diff = safeInt(player.recent_blitz_diff);
-      player.bullet_diff = safeInt(player.recent_bullet_diff);
-      player.rapid_diff = safeInt(player.recent_rapid_diff);
+  for (const player of players) {
+    if (player.seenAt === null || player.seenAt < cutoffMs) {
+      continue;
     }
 
-    delete player.recent_blitz_diff;
-    delete player.recent_bullet_diff;
-    delete player.recent_rapid_diff;
+    keys[active.length] =
+      (packRating(player.blitz) * RATING_KEY_RADIX + packRating(player.bullet)) *
+        RATING_KEY_RADIX +
+      packRating(player.rapid);
+    active.push(player);
   }
 
-  players.forEach((player, index) => {
-    const currentPosition = index + 1;
-    const username = String(player?.username || "").trim().toLowerCase();
-    const previousPosition = previousRankByUsername.get(username);
-
-    player.position = currentPosition;
-
-    if (!previousPosition) {
-      player.position_change = null;
-      player.position_arrow = null;
-    } else {
-      const change = previousPosition - currentPosition;
-      player.position_change = change;
-      player.position_arrow = change > 0 ? "\u25B2" : change < 0 ? "\u25BC" : "\u2192";
-    }
+  const indexes = Array.from({ length: active.length }, (_, index) => index);
+  indexes.sort((left, right) => keys[right] - keys[left] || left - right);
 
-    player.blitz_status = ratingStatus(player.blitz_diff);
-    player.bullet_status = ratingStatus(player.bullet_diff);
-    player.rapid_status = ratingStatus(player.rapid_diff);
-  });
+  return indexes.map((index) => active[index]);
+}
+
+function serializePayload(payload) {
+  return JSON.stringify(payload) + "\n";
 }
 
 async function writeOutput(players, outputPath, shouldWriteFile) {
@@ -93,8 +172,23 @@ async function writeOutput(players, outputPath, shouldWriteFile) {
   };
 
   if (shouldWriteFile) {
+    // Mesmos jogadores do arquivo anterior: mantem o arquivo (e o generated_at) intacto.
+    const previous = await readPreviousFile(outputPath);
+    const previousGeneratedAt = previous?.payload?.generated_at;
+    if (
+      Number.isFinite(previousGeneratedAt) &&
+      serializePayload({ ...payload, generated_at: previousGeneratedAt }) === previous.text
+    ) {
+      await writeCachedText(getSnapshotCheckKey(outputPath), String(previousGeneratedAt));
+      return previous.payload;
+    }
+
+    const tempPath = `${outputPath}.${process.pid}.tmp`;
     await mkdir(path.dirname(outputPath), { recursive: true });
-    await writeFile(outputPath, JSON.stringify(payload, null, 2) + "\n", "utf8");
+    await writeFile(tempPath, serializePayload(payload), "utf8");
+    await rename(tempPath, outputPath);
+    previousFiles.delete(outputPath);
+    await writeCachedText(getSnapshotCheckKey(outputPath), String(payload.generated_at));
   }
 
   return payload;
@@ -106,15 +200,7 @@ export async function finalizePlayers({
   writeFile: shouldWriteFile = true,
   enrichPlayers
 }) {
-  const deduped = dedupePlayers(players);
-  const activePlayers = deduped.filter((player) => activeSinceDays(player));
-  const sortedPlayers = [...activePlayers].sort((left, right) => {
-    return (
-      safeInt(right.blitz) - safeInt(left.blitz) ||
-      safeInt(right.bullet) - safeInt(left.bullet) ||
-      safeInt(right.rapid) - safeInt(left.rapid)
-    );
-  });
+  const sortedPlayers = sortActiveByRatings(dedupePlayers(players));
 
   const previousPlayers = shouldWriteFile ? await readPreviousPlayers(outputPath) : [];
   enrichWithDeltasAndPositions(sortedPlayers, previousPlayers);
@@ -1,5 +1,13 @@
 export const MAX_CONCURRENCY = 8;
+// Lichess usa uma unica sessao HTTP/2: requisicoes extras viram streams, nao conexoes.
+export const LICHESS_MAX_CONCURRENCY = 16;
 export const REQUEST_TIMEOUT_MS = 12_000;
+export const MAX_RETRY_DELAY_MS = 4_000;
+export const RETRY_PASSES = 2;
+export const RETRY_PASS_DELAY_MS = 1_000;
+export const RETRY_PASS_DEADLINE_MS = 60_000;
+export const USER_CACHE_TTL_MS = 6 * 60 * 60 * 1000;
+export const USER_CACHE_STALE_TTL_MS = 7 * 24 * 60 * 60 * 1000;
 export const ACTIVE_DAYS = 30;
 export const LEADERBOARD_PAGE_SIZE = 50;
 export const CHESSCOM_MAX_LEADERBOARD_PAGES = 512;
@@ -11,6 +19,18 @@ export const SPECIAL_TITLE_OVERRIDES = Object.freeze({
 });
 
 export function safeInt(value, fallback = 0) {
+  if (Number.isInteger(value)) {
+    return value;
+  }
+
+  if (typeof value === "number") {
+    return Number.isFinite(value) ? Math.trunc(value) : fallback;
+  }
+
+  if (value === null || value === undefined) {
+    return fallback;
+  }
+
   const parsed = Number.parseInt(value, 10);
   return Number.isFinite(parsed) ? parsed : fallback;
 }
@@ -20,7 +40,7 @@ export function safeTimestampMs(value) {
     return null;
   }
 
-  const parsed = Number.parseInt(String(value), 10);
+  const parsed = Number.isInteger(value) ? value : Number.parseInt(String(value), 10);
   if (!Number.isFinite(parsed)) {
     return null;
   }
@@ -46,16 +66,100 @@ export function sleep(ms) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+// Avisos saem em bloco no maximo uma vez por segundo.
+const WARNING_FLUSH_INTERVAL_MS = 1_000;
+const pendingWarnings = [];
+let warningFlushTimer = null;
+
+export function flushWarnings() {
+  if (warningFlushTimer) {
+    clearTimeout(warningFlushTimer);
+    warningFlushTimer = null;
+  }
+
+  if (pendingWarnings.length > 0) {
+    process.stderr.write(`${pendingWarnings.join("\n")}\n`);
+    pendingWarnings.length = 0;
+  }
+}
+
+export function logWarning(message) {
+  pendingWarnings.push(`warning: ${message}`);
+
+  if (!warningFlushTimer) {
+    warningFlushTimer = setTimeout(flushWarnings, WARNING_FLUSH_INTERVAL_MS);
+    warningFlushTimer.unref();
+  }
+}
+
+process.on("exit", flushWarnings);
+
+const GONE_STATUS_CODES = new Set([404, 410]);
+
+export function isGoneError(error) {
+  return GONE_STATUS_CODES.has(error?.statusCode);
+}
+
+// Conta removida vira false (sem retry); as demais falhas, null.
+export function reportFetchFailure(label, error, finalAttempt) {
+  const gone = isGoneError(error);
+  if (finalAttempt || gone) {
+    logWarning(`erro ao buscar ${label}: ${error.message}`);
+  }
+  return gone ? false : null;
+}
+
+const URL_SAFE_USERNAME_PATTERN = /^[A-Za-z0-9_-]+$/;
+
+export function encodeUsernamePath(username) {
+  return URL_SAFE_USERNAME_PATTERN.test(username) ? username : encodeURIComponent(username);
+}
+
+export function chunkItems(items, size) {
+  const chunks = [];
+  for (let index = 0; index < items.length; index += size) {
+    chunks.push(items.slice(index, index + size));
+  }
+  return chunks;
+}
+
+export function createLimiter(limit) {
+  const queue = [];
+  let active = 0;
+
+  const runNext = () => {
+    if (active >= limit || queue.length === 0) {
+      return;
+    }
+
+    const { task, resolve, reject } = queue.shift();
+    active += 1;
+    Promise.resolve()
+      .then(task)
+      .then(resolve, reject)
+      .finally(() => {
+        active -= 1;
+        runNext();
+      });
+  };
+
+  return (task) =>
+    new Promise((resolve, reject) => {
+      queue.push({ task, resolve, reject });
+      runNext();
+    });
+}
+
 export async function mapWithConcurrency(items, limit, worker) {
-  const queue = [...items];
-  const results = [];
-  const workerCount = Math.max(1, Math.min(limit, queue.length || 1));
+  const results = new Array(items.length);
+  const workerCount = Math.max(1, Math.min(limit, items.length || 1));
+  let nextIndex = 0;
 
   const runners = Array.from({ length: workerCount }, async () => {
-    while (queue.length > 0) {
-      const item = queue.shift();
-      const result = await worker(item);
-      results.push(result);
+    while (nextIndex < items.length) {
+      const index = nextIndex;
+      nextIndex += 1;
+      results[index] = await worker(items[index]);
     }
   });
 
@@ -63,14 +167,65 @@ export async function mapWithConcurrency(items, limit, worker) {
   return results;
 }
 
-export function activeSinceDays(player, days = ACTIVE_DAYS) {
-  const seenAt = safeTimestampMs(player?.seenAt);
-  if (!seenAt) {
-    return false;
+export async function mapWithRetryPass(
+  items,
+  limit,
+  worker,
+  {
+    passes = RETRY_PASSES,
+    passDelayMs = RETRY_PASS_DELAY_MS,
+    deadlineMs = RETRY_PASS_DEADLINE_MS
+  } = {}
+) {
+  const results = new Array(items.length).fill(null);
+  const skippedIndexes = [];
+  let retryDeadline = Infinity;
+  let pendingIndexes = items.map((_, index) => index);
+
+  for (let pass = 1; pass <= passes && pendingIndexes.length > 0; pass += 1) {
+    if (pass > 1) {
+      const delayMs = passDelayMs * 2 ** (pass - 2) * (0.5 + Math.random());
+      if (Date.now() + delayMs > retryDeadline) {
+        skippedIndexes.push(...pendingIndexes);
+        break;
+      }
+      await sleep(delayMs);
+    }
+
+    const finalAttempt = pass === passes;
+    const failedIndexes = [];
+    await mapWithConcurrency(pendingIndexes, limit, async (index) => {
+      if (Date.now() > retryDeadline) {
+        skippedIndexes.push(index);
+        return;
+      }
+
+      results[index] = await worker(items[index], { finalAttempt });
+      // null marca falha transitoria; false, definitiva (sem nova passada).
+      if (results[index] === null) {
+        failedIndexes.push(index);
+      }
+    });
+    pendingIndexes = failedIndexes;
+
+    if (pass === 1) {
+      retryDeadline = Date.now() + deadlineMs;
+    }
   }
 
-  const ageDays = (Date.now() - seenAt) / (24 * 60 * 60 * 1000);
-  return ageDays <= days;
+  if (skippedIndexes.length > 0) {
+    // Lotes (arrays de usernames) sao achatados para listar cada usuario.
+    const leftBehind = skippedIndexes.flatMap((index) => items[index]);
+    logWarning(
+      `prazo de retry esgotado; ${leftBehind.length} itens ficaram sem nova tentativa: ${leftBehind.join(", ")}`
+    );
+  }
+
+  return results;
+}
+
+export function getActiveCutoffMs(days = ACTIVE_DAYS) {
+  return Date.now() - days * 24 * 60 * 60 * 1000;
 }
 
 export function ratingStatus(diff) {
@@ -80,59 +235,45 @@ export function ratingStatus(diff) {
   return "manteve";
 }
 
+export function getUsernameKey(player) {
+  return String(player?.username || "").trim().toLowerCase();
+}
+
+function hasUniqueUsernames(players) {
+  const usernames = new Set();
+  for (const player of players) {
+    const username = getUsernameKey(player);
+    if (!username || usernames.has(username)) {
+      return false;
+    }
+    usernames.add(username);
+  }
+
+  return true;
+}
+
 export function dedupePlayers(players) {
-  const byUsername = new Map();
+  // As fontes ja entregam um jogador por membro; so ha o que escolher com repeticao.
+  if (hasUniqueUsernames(players)) {
+    return players;
+  }
 
-  const totalScore = (player) =>
-    safeInt(player?.blitz) + safeInt(player?.bullet) + safeInt(player?.rapid);
+  const byUsername = new Map();
 
   for (const player of players) {
-    const username = String(player?.username || "").trim().toLowerCase();
+    const username = getUsernameKey(player);
     if (!username) {
       continue;
     }
 
+    const score = (player.blitz ?? 0) + (player.bullet ?? 0) + (player.rapid ?? 0);
+    const seen = player.seenAt ?? 0;
     const existing = byUsername.get(username);
-    if (!existing) {
-      byUsername.set(username, player);
-      continue;
-    }
-
-    const existingSeen = safeTimestampMs(existing.seenAt) || 0;
-    const currentSeen = safeTimestampMs(player.seenAt) || 0;
 
-    if (totalScore(player) > totalScore(existing) || currentSeen > existingSeen) {
-      byUsername.set(username, player);
+    if (!existing || score > existing.score || seen > existing.seen) {
+      byUsername.set(username, { player, score, seen });
     }
   }
 
-  return [...byUsername.values()];
-}
-
-export function initPlayerMetadata(player) {
-  const username = String(player?.username || "").trim().toLowerCase();
-  const explicitTitle = String(player?.title || "").trim().toUpperCase();
-  player.title = SPECIAL_TITLE_OVERRIDES[username] || explicitTitle || null;
-  player.country_code = normalizeCountryCode(player?.country_code);
-  player.country_name = String(player?.country_name || "").trim() || null;
-
-  for (const rhythm of ["blitz", "bullet", "rapid"]) {
-    if (!(Object.prototype.hasOwnProperty.call(player, `${rhythm}_country_rank`))) {
-      player[`${rhythm}_country_rank`] = null;
-    }
-  }
-}
-
-export function parseJsonLines(text) {
-  return String(text || "")
-    .split(/\r?\n/)
-    .map((line) => line.trim())
-    .filter(Boolean)
-    .map((line) => {
-      try {
-        return JSON.parse(line);
-      } catch {
-        return line;
-      }
-    });
+  return Array.from(byUsername.values(), (entry) => entry.player);
 }
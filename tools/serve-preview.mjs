@@ -1,7 +1,10 @@
+import { createHash } from "node:crypto";
 import { createServer } from "node:http";
-import { readFile } from "node:fs/promises";
+import { readFile, stat } from "node:fs/promises";
 import path from "node:path";
 import { fileURLToPath } from "node:url";
+import { promisify } from "node:util";
+import { brotliCompress, constants as zlibConstants, gzip } from "node:zlib";
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -20,6 +23,24 @@ const mimeTypes = new Map([
   [".jpeg", "image/jpeg"],
   [".ico", "image/x-icon"]
 ]);
+const compressibleExtensions = new Set([".html", ".css", ".js", ".json", ".svg"]);
+const responseCache = new Map();
+const FILE_RECHECK_MS = 1_000;
+const brotliCompressAsync = promisify(brotliCompress);
+const gzipAsync = promisify(gzip);
+const contentEncoders = [
+  {
+    encoding: "br",
+    encode: (body) =>
+      brotliCompressAsync(body, {
+        params: { [zlibConstants.BROTLI_PARAM_QUALITY]: 11 }
+      })
+  },
+  {
+    encoding: "gzip",
+    encode: (body) => gzipAsync(body, { level: 9 })
+  }
+];
 
 function resolveFilePath(requestUrl) {
   const pathname = decodeURIComponent(new URL(requestUrl, `http://127.0.0.1:${port}`).pathname);
@@ -33,6 +54,105 @@ function resolveFilePath(requestUrl) {
   return resolvedPath;
 }
 
+async function loadCachedFile(filePath) {
+  const cached = responseCache.get(filePath);
+  if (cached && Date.now() - cached.checkedAt < FILE_RECHECK_MS) {
+    return cached;
+  }
+
+  const { mtimeMs, size } = await stat(filePath);
+
+  if (cached && cached.mtimeMs === mtimeMs && cached.size === size) {
+    cached.checkedAt = Date.now();
+    return cached;
+  }
+
+  const body = await readFile(filePath);
+  const extension = path.extname(filePath).toLowerCase();
+  const entry = {
+    mtimeMs,
+    size,
+    checkedAt: Date.now(),
+    body,
+    compressible: compressibleExtensions.has(extension),
+    encodedBodies: new Map(),
+    contentType: mimeTypes.get(extension) || "application/octet-stream",
+    etag: `"${createHash("sha1").update(body).digest("base64url")}"`,
+    lastModified: new Date(mtimeMs).toUTCString()
+  };
+
+  if (entry.compressible) {
+    for (const { encoding, encode } of contentEncoders) {
+      const encoded = encode(body);
+      encoded.catch(() => {});
+      entry.encodedBodies.set(encoding, encoded);
+    }
+  }
+
+  responseCache.set(filePath, entry);
+  return entry;
+}
+
+// Cada codificacao e uma representacao distinta, com a sua propria tag.
+function getRepresentationEtag(entry, encoding) {
+  return encoding ? `${entry.etag.slice(0, -1)}-${encoding}"` : entry.etag;
+}
+
+function isNotModified(entry, etag, headers) {
+  // If-None-Match pode trazer varias tags, inclusive fracas.
+  const ifNoneMatch = headers["if-none-match"];
+  if (ifNoneMatch) {
+    return ifNoneMatch
+      .split(",")
+      .map((tag) => tag.trim().replace(/^W\//, ""))
+      .some((tag) => tag === "*" || tag === etag);
+  }
+
+  const ifModifiedSince = Date.parse(headers["if-modified-since"] || "");
+  return Number.isFinite(ifModifiedSince) && Math.floor(entry.mtimeMs / 1000) * 1000 <= ifModifiedSince;
+}
+
+// Codificacoes com q=0 sao recusas explicitas.
+function parseAcceptedEncodings(acceptEncoding) {
+  const accepted = new Set();
+
+  for (const part of String(acceptEncoding || "").toLowerCase().split(",")) {
+    const [coding, ...params] = part.split(";").map((value) => value.trim());
+    const qParam = params.find((param) => param.startsWith("q="));
+    const quality = qParam ? Number(qParam.slice(2)) : 1;
+    if (coding && quality > 0) {
+      accepted.add(coding);
+    }
+  }
+
+  return accepted;
+}
+
+async function negotiateEncoding(entry, acceptEncoding) {
+  if (!entry.compressible) {
+    return null;
+  }
+
+  const accepted = parseAcceptedEncodings(acceptEncoding);
+  for (const { encoding } of contentEncoders) {
+    const encoded = entry.encodedBodies.get(encoding);
+    if (!encoded || !accepted.has(encoding)) {
+      continue;
+    }
+
+    // Compressao que falhou sai da entrada; a resposta segue sem ela.
+    try {
+      return { encoding, body: await encoded };
+    } catch {
+      if (entry.encodedBodies.get(encoding) === encoded) {
+        entry.encodedBodies.delete(encoding);
+      }
+    }
+  }
+
+  return null;
+}
+
 const server = createServer(async (request, response) => {
   const filePath = resolveFilePath(request.url || "/");
 
@@ -43,10 +163,28 @@ const server = createServer(async (request, response) => {
   }
 
   try {
-    const body = await readFile(filePath);
-    const extension = path.extname(filePath).toLowerCase();
-    response.setHeader("Content-Type", mimeTypes.get(extension) || "application/octet-stream");
-    response.end(body);
+    const entry = await loadCachedFile(filePath);
+    const encoded = await negotiateEncoding(entry, request.headers["accept-encoding"]);
+    const etag = getRepresentationEtag(entry, encoded?.encoding);
+    response.setHeader("Content-Type", entry.contentType);
+    response.setHeader("ETag", etag);
+    response.setHeader("Last-Modified", entry.lastModified);
+    response.setHeader("Cache-Control", "no-cache");
+    response.setHeader("Vary", "Accept-Encoding");
+
+    if (isNotModified(entry, etag, request.headers)) {
+      response.statusCode = 304;
+      response.end();
+      return;
+    }
+
+    if (encoded) {
+      response.setHeader("Content-Encoding", encoded.encoding);
+      response.end(encoded.body);
+      return;
+    }
+
+    response.end(entry.body);
   } catch {
     response.statusCode = 404;
     response.end("Not found");